@@ -0,0 +1,70 @@
+"""
+Collection (and run) micro-benchmark of a suite of parametrized coroutine
+tests, e.g.
+
+    $ python benchmarks/collection.py --tests 50000
+    $ python benchmarks/collection.py --tests 20000 --run -- --sanic-batch
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+
+TEST_MODULE = '''
+import pytest
+
+
+@pytest.fixture
+def value():
+    return 1
+
+
+@pytest.mark.parametrize("n", range({count}))
+async def test_async(n, value):
+    assert value == 1
+'''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--tests', type=int, default=50000,
+                        help='number of parametrized async tests')
+    parser.add_argument('--modules', type=int, default=10,
+                        help='number of test modules to spread them over')
+    parser.add_argument('--run', action='store_true',
+                        help='run the tests too, not only collect them')
+    parser.add_argument('pytest_args', nargs='*',
+                        help='extra pytest arguments, after --')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(args.modules):
+            path = os.path.join(
+                directory, 'test_bench_{index}.py'.format(index=index))
+            with open(path, 'w') as f:
+                f.write(TEST_MODULE.format(count=args.tests // args.modules))
+
+        command = [
+            sys.executable, '-m', 'pytest', '-q', '-p', 'pytest_sanic.plugin',
+            '-p', 'no:cacheprovider', directory,
+        ] + args.pytest_args
+        if not args.run:
+            command.append('--collect-only')
+        start = time.perf_counter()
+        output = subprocess.run(
+            command, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        elapsed = time.perf_counter() - start
+
+    print(output.strip().splitlines()[-1])
+    print('{mode} {tests} tests in {elapsed:.2f}s ({per:.1f}us per test)'.format(
+        mode='ran' if args.run else 'collected',
+        tests=args.tests,
+        elapsed=elapsed,
+        per=elapsed / args.tests * 1e6))
+
+
+if __name__ == '__main__':
+    main()
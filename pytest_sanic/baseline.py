@@ -0,0 +1,180 @@
+import statistics
+
+
+# the running recorder, TestServer and TestClient report metrics to it.
+RECORDER = None
+
+# runs kept per baseline, the comparison is made against all of them,
+# once there are MIN_ROUNDS of them.
+ROUNDS = 10
+MIN_ROUNDS = 3
+# a metric regresses when it goes past the baseline median by more than
+# MAD_FACTOR scaled MADs, and by more than a tolerance (relative, 25% by
+# default) and MIN_DELTA (seconds) at least, so that noise is not taken for
+# regression.
+MAD_FACTOR = 3.0
+TOLERANCE = 0.25
+MIN_DELTA = 0.005
+# MAD to standard deviation, for normally distributed samples.
+MAD_SCALE = 1.4826
+
+
+def record(metric, value):
+    """
+    Record a measurement (in seconds) of the current test.
+    """
+    if RECORDER is not None:
+        RECORDER.record(metric, value)
+
+
+def mad(values):
+    """
+    Median absolute deviation.
+    """
+    center = statistics.median(values)
+    return statistics.median([abs(value - center) for value in values])
+
+
+class Regression:
+
+    """
+    a metric of the test ``nodeid`` which went past its baseline threshold.
+    """
+
+    def __init__(self, nodeid, metric, value, median, threshold):
+        self.nodeid = nodeid
+        self.metric = metric
+        self.value = value
+        self.median = median
+        self.threshold = threshold
+
+    def format(self):
+        return (
+            "{metric} regressed: {value:.6f}s, baseline median "
+            "{median:.6f}s (threshold {threshold:.6f}s)"
+        ).format(
+            metric=self.metric,
+            value=self.value,
+            median=self.median,
+            threshold=self.threshold,
+        )
+
+
+class BaselineRecorder:
+
+    """
+    records per test metrics (test wall time, request latencies, server
+    start and stop times), saves them as a round of a named baseline in the
+    pytest cache, and compares them with the rounds of another baseline.
+
+    The value of a metric in a run is the median of its samples.
+    """
+
+    def __init__(self, cache, save=None, compare=None, fail=False,
+                 rounds=ROUNDS, tolerance=TOLERANCE):
+        if cache is None:
+            raise ValueError(
+                "benchmark baselines need the pytest cache (cacheprovider).")
+        self.cache = cache
+        self.save_name = save
+        self.compare_name = compare
+        self.fail = fail
+        self.rounds = rounds
+        self.tolerance = tolerance
+        self.nodeid = None
+        self.regressions = []
+        self._samples = {}
+        self._baseline = {}
+        if compare is not None:
+            self._baseline = self.load(compare)
+
+    def start(self):
+        global RECORDER
+        RECORDER = self
+
+    def stop(self):
+        global RECORDER
+        if RECORDER is self:
+            RECORDER = None
+
+    def _key(self, name):
+        return "sanic/baselines/{name}".format(name=name)
+
+    def load(self, name):
+        return self.cache.get(self._key(name), {})
+
+    def record(self, metric, value):
+        samples = self._samples.setdefault(self.nodeid, {})
+        samples.setdefault(metric, []).append(value)
+
+    def summary(self, nodeid):
+        return {
+            metric: statistics.median(values)
+            for metric, values in self._samples.get(nodeid, {}).items()
+        }
+
+    def compare(self, nodeid):
+        """
+        Regressions of a test, against the baseline rounds.
+        """
+        regressions = []
+        baseline = self._baseline.get(nodeid, {})
+        for metric, value in sorted(self.summary(nodeid).items()):
+            rounds = baseline.get(metric)
+            if not rounds or len(rounds) < MIN_ROUNDS:
+                continue
+            median = statistics.median(rounds)
+            threshold = median + max(
+                MAD_FACTOR * MAD_SCALE * mad(rounds),
+                self.tolerance * median,
+                MIN_DELTA)
+            if value > threshold:
+                regressions.append(
+                    Regression(nodeid, metric, value, median, threshold))
+        return regressions
+
+    def check(self, report):
+        """
+        Compare the metrics of a test once torn down, failing its teardown
+        report on regressions when asked to.
+        """
+        if report.when != 'teardown' or self.compare_name is None:
+            return
+        regressions = self.compare(report.nodeid)
+        self.regressions.extend(regressions)
+        if regressions and self.fail and report.passed:
+            report.outcome = 'failed'
+            report.longrepr = '\n'.join(
+                regression.format() for regression in regressions)
+
+    def save(self):
+        """
+        Add the metrics of this run as a new round of the saved baseline,
+        keeping the last ``rounds`` rounds.
+        """
+        if self.save_name is None:
+            return
+        data = self.load(self.save_name)
+        for nodeid in self._samples:
+            metrics = data.setdefault(nodeid, {})
+            for metric, value in self.summary(nodeid).items():
+                rounds = metrics.setdefault(metric, [])
+                rounds.append(value)
+                del rounds[:-self.rounds]
+        self.cache.set(self._key(self.save_name), data)
+
+    def report(self, terminalreporter):
+        if self.compare_name is not None:
+            terminalreporter.write_sep(
+                '=', 'sanic baseline comparison ({name})'.format(
+                    name=self.compare_name))
+            if not self.regressions:
+                terminalreporter.write_line('no regression')
+            for regression in self.regressions:
+                terminalreporter.write_line('{nodeid}  {regression}'.format(
+                    nodeid=regression.nodeid,
+                    regression=regression.format()))
+        if self.save_name is not None:
+            terminalreporter.write_line(
+                'sanic baseline {name} saved ({count} tests)'.format(
+                    name=self.save_name, count=len(self._samples)))
@@ -0,0 +1,231 @@
+import time
+import asyncio
+
+from collections import Counter
+
+
+def percentile(samples, percent):
+    """
+    Nearest-rank percentile of sorted samples.
+
+    :param samples: sorted list of numbers
+    :param percent: percentile, between 0 and 100
+    """
+    if not samples:
+        return None
+    rank = max(int(round(percent / 100.0 * len(samples))), 1)
+    return samples[min(rank, len(samples)) - 1]
+
+
+class BenchStats:
+
+    """
+    latency and throughput figures of a benchmark run, latencies are in
+    seconds.
+    """
+
+    def __init__(self, latencies, elapsed, statuses=None, errors=0):
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.statuses = Counter(statuses or ())
+        self.errors = errors
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        """
+        Completed requests per second.
+        """
+        if not self.elapsed:
+            return 0.0
+        return self.requests / self.elapsed
+
+    @property
+    def min(self):
+        return self.latencies[0] if self.latencies else None
+
+    @property
+    def max(self):
+        return self.latencies[-1] if self.latencies else None
+
+    @property
+    def mean(self):
+        if not self.latencies:
+            return None
+        return sum(self.latencies) / len(self.latencies)
+
+    def percentile(self, percent):
+        return percentile(self.latencies, percent)
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p95(self):
+        return self.percentile(95)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+    def __repr__(self):
+        return (
+            "<BenchStats requests={requests} errors={errors} "
+            "throughput={throughput:.1f}/s p50={p50} p95={p95} p99={p99}>"
+        ).format(
+            requests=self.requests,
+            errors=self.errors,
+            throughput=self.throughput,
+            p50=self.p50,
+            p95=self.p95,
+            p99=self.p99,
+        )
+
+
+async def bench(client, uri, method='GET', requests=100, concurrency=10,
+                warmup=0, **kwargs):
+    """
+    Fire ``requests`` requests at ``uri`` through a TestClient's shared
+    session, at most ``concurrency`` of them in flight at once.
+
+    Responses are released as soon as they are read, only their latency
+    and status code are kept. Failed requests are counted as errors.
+    Measured requests are sent as any TestClient request is: recorded in
+    ``client.stats``, memory tracking and baselines; warmup requests skip
+    all of these.
+
+    :param client: a started TestClient
+    :param warmup: number of requests sent (sequentially) before measuring
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency should be a positive number.")
+    url = client.make_url(uri)
+    session = client.session
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = []
+    errors = 0
+
+    for _ in range(warmup):
+        await session.request(method, url, **kwargs)
+
+    async def send():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client._request(method, uri, **kwargs)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[send() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    return BenchStats(latencies, elapsed, statuses=statuses, errors=errors)
+
+
+class WsBenchStats(BenchStats):
+
+    """
+    message round trip latency and throughput figures of a websocket
+    benchmark run, ``server_connections`` is the number of connections the
+    server held once all websockets were open.
+    """
+
+    def __init__(self, latencies, elapsed, connections,
+                 server_connections=None, errors=0):
+        super().__init__(latencies, elapsed, errors=errors)
+        self.connections = connections
+        self.server_connections = server_connections
+
+    @property
+    def messages(self):
+        return len(self.latencies)
+
+    def __repr__(self):
+        return (
+            "<WsBenchStats connections={connections} messages={messages} "
+            "errors={errors} throughput={throughput:.1f}/s p50={p50} "
+            "p95={p95} p99={p99}>"
+        ).format(
+            connections=self.connections,
+            messages=self.messages,
+            errors=self.errors,
+            throughput=self.throughput,
+            p50=self.p50,
+            p95=self.p95,
+            p99=self.p99,
+        )
+
+
+async def ws_bench(client, uri, connections=10, messages=100, rate=None,
+                   payload='ping', warmup=0, timeout=10.0, **kwargs):
+    """
+    Open ``connections`` websockets to ``uri`` concurrently and send
+    ``messages`` messages over each of them, waiting for the reply to
+    every message before sending the next one. The route is expected to
+    answer every message it receives.
+
+    A connection failing, or a reply not coming back within ``timeout``
+    seconds, stops its own pump, its remaining messages are counted as
+    errors. All websockets are closed concurrently at the end.
+
+    :param client: a started TestClient, with a ``ws`` scheme
+    :param rate: messages per second sent over each connection, as fast as
+        replies come back when None
+    :param warmup: messages sent over each connection before measuring
+    :param timeout: seconds to wait for each reply
+    """
+    if connections < 1:
+        raise ValueError("connections should be a positive number.")
+    loop = asyncio.get_event_loop()
+    interval = 1.0 / rate if rate else None
+    latencies = []
+    errors = 0
+
+    sockets = await asyncio.gather(
+        *[client.ws_connect(uri, **kwargs) for _ in range(connections)])
+    server_connections = None
+    if client.stats.server_connections is not None:
+        server_connections = len(client.server.connections)
+
+    async def warm(ws):
+        for _ in range(warmup):
+            await ws.send(payload)
+            await asyncio.wait_for(ws.recv(), timeout)
+
+    async def pump(ws):
+        nonlocal errors
+        next_send = loop.time()
+        for sent in range(messages):
+            if interval is not None:
+                delay = next_send - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_send += interval
+            start = time.perf_counter()
+            try:
+                await ws.send(payload)
+                await asyncio.wait_for(ws.recv(), timeout)
+            except Exception:
+                errors += messages - sent
+                return
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        await asyncio.gather(*[warm(ws) for ws in sockets])
+        start = time.perf_counter()
+        await asyncio.gather(*[pump(ws) for ws in sockets])
+        elapsed = time.perf_counter() - start
+    finally:
+        await asyncio.gather(
+            *[ws.close() for ws in sockets], return_exceptions=True)
+    return WsBenchStats(latencies, elapsed, connections,
+                        server_connections=server_connections, errors=errors)
@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import traceback
+
+from inspect import CO_COROUTINE, CO_ITERABLE_COROUTINE, CO_ASYNC_GENERATOR
+
+
+ASYNC_FLAGS = CO_COROUTINE | CO_ITERABLE_COROUTINE | CO_ASYNC_GENERATOR
+HANDLE_RUN_FILE = os.path.join('asyncio', 'events.py')
+
+
+class BlockingCall:
+
+    """
+    a callback which blocked the event loop, ``duration`` is in seconds and
+    ``stack`` is where the loop thread was stuck, when caught.
+    """
+
+    def __init__(self, nodeid, duration, stack=None, callback=None):
+        self.nodeid = nodeid
+        self.duration = duration
+        self.stack = stack
+        self.callback = callback
+
+    def format(self):
+        lines = ["event loop blocked for {duration:.3f}s{callback}".format(
+            duration=self.duration,
+            callback=" by " + self.callback if self.callback else "",
+        )]
+        if self.stack:
+            lines.extend(line.rstrip('\n') for line in self.stack)
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {
+            "nodeid": self.nodeid,
+            "duration": self.duration,
+            "callback": self.callback,
+            "stack": self.stack,
+        }
+
+
+class _SlowCallbackHandler(logging.Handler):
+
+    """
+    collects "Executing <handle> took N seconds" warnings of asyncio (and
+    uvloop) debug mode.
+    """
+
+    def __init__(self, detector):
+        super().__init__(logging.WARNING)
+        self.detector = detector
+
+    def emit(self, record):
+        # anything else may be logged on the asyncio logger.
+        if not isinstance(record.msg, str) or \
+                not isinstance(record.args, tuple):
+            return
+        if record.msg.startswith('Executing') and len(record.args) == 2:
+            handle, duration = record.args
+            self.detector.slow_callback(str(handle), duration)
+
+
+class BlockingDetector:
+
+    """
+    detects callbacks blocking an event loop for longer than ``threshold``
+    seconds.
+
+    Loops run in debug mode so that slow callbacks are logged, while a
+    watchdog thread samples the stack of the loop thread whenever the loop
+    stops processing its heartbeat in the middle of a callback.
+    """
+
+    def __init__(self, threshold, report_path=None):
+        self.threshold = threshold
+        self.report_path = report_path
+        self.interval = max(threshold / 4.0, 0.001)
+        self.nodeid = None
+        self.calls = []
+        self._pending = []
+        self._lock = threading.Lock()
+        self._beats = 0
+        self._stall = None
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._handler = _SlowCallbackHandler(self)
+        self._watchdog = None
+
+    def start(self):
+        logging.getLogger('asyncio').addHandler(self._handler)
+        self._watchdog = threading.Thread(
+            target=self._watch, name='pytest-sanic-watchdog', daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        logging.getLogger('asyncio').removeHandler(self._handler)
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    def loop_factory(self, factory):
+        """
+        Wrap an event loop factory, so that created loops are watched.
+        """
+        def new_event_loop():
+            loop = factory()
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+            self._heartbeat(loop)
+            return loop
+
+        return new_event_loop
+
+    def _heartbeat(self, loop):
+        self._beats += 1
+        loop.call_later(self.interval, self._heartbeat, loop)
+
+    def _callback_stack(self, frame):
+        """
+        Stack of the callback (or task step) the loop thread is running,
+        outermost frame first, or None when it is not running one.
+        """
+        frames = []
+        callback = None
+        while frame is not None:
+            frames.append(frame)
+            code = frame.f_code
+            if code.co_flags & ASYNC_FLAGS or (
+                    code.co_name == '_run' and
+                    code.co_filename.endswith(HANDLE_RUN_FILE)):
+                callback = len(frames)
+            frame = frame.f_back
+        if callback is None:
+            return None
+        return frames[:callback][::-1]
+
+    def _watch(self):
+        beats = None
+        since = None
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            now = time.perf_counter()
+            stack = self._callback_stack(frame)
+            del frame
+            if beats != self._beats or stack is None:
+                beats, since = self._beats, None
+                self._stall = None
+                continue
+            if since is None:
+                since = now
+                continue
+            duration = now - since + self.interval
+            if self._stall is not None:
+                self._stall.duration = duration
+            elif duration >= self.threshold:
+                self._stall = BlockingCall(
+                    self.nodeid, duration, traceback.format_list(
+                        [(f.f_code.co_filename, f.f_lineno, f.f_code.co_name,
+                          None) for f in stack]))
+                self._record(self._stall)
+
+    def _record(self, call):
+        with self._lock:
+            self.calls.append(call)
+            self._pending.append(call)
+
+    def slow_callback(self, callback, duration):
+        """
+        A slow callback was logged by the loop, once it returned.
+        """
+        stall = self._stall
+        if stall is not None and stall.callback is None:
+            stall.callback = callback
+            stall.duration = max(stall.duration, duration)
+        else:
+            self._record(BlockingCall(self.nodeid, duration, callback=callback))
+
+    def check(self, report):
+        """
+        Fail a (passing) test report with the blocking calls caught since
+        the previous report, unless they go to a report file.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        self._stall = None
+        if pending and self.report_path is None and report.passed:
+            report.outcome = 'failed'
+            report.longrepr = '\n\n'.join(call.format() for call in pending)
+
+    def write_report(self):
+        with open(self.report_path, 'w') as f:
+            json.dump([call.to_dict() for call in self.calls], f, indent=2)
+
+    def report(self, terminalreporter):
+        if not self.calls:
+            return
+        terminalreporter.write_sep('=', 'sanic blocking calls')
+        for call in self.calls:
+            terminalreporter.write_line(
+                '{duration:8.3f}s  {nodeid}  {callback}'.format(
+                    duration=call.duration,
+                    nodeid=call.nodeid,
+                    callback=call.callback or '',
+                ))
+        if self.report_path:
+            terminalreporter.write_line(
+                'report written to {path}'.format(path=self.report_path))
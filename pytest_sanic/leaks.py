@@ -0,0 +1,170 @@
+import gc
+import asyncio
+import warnings
+import weakref
+
+from contextlib import contextmanager
+
+
+# the running detector, TestServer and TestClient register with it.
+DETECTOR = None
+
+
+def track(resource):
+    """
+    Register a TestServer or TestClient with the running leak detector.
+    """
+    if DETECTOR is not None:
+        DETECTOR.track(resource)
+
+
+def cancel_pending_tasks(loop):
+    """
+    Cancel the tasks still pending on a loop, and return them.
+    """
+    if not asyncio.all_tasks(loop):
+        return set()
+    # let tasks cancelled on teardown (e.g. server connections) finish.
+    loop.run_until_complete(asyncio.sleep(0))
+    tasks = asyncio.all_tasks(loop)
+    if not tasks:
+        return tasks
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(
+        asyncio.gather(*tasks, return_exceptions=True))
+    return tasks
+
+
+class Leak:
+
+    """
+    a resource left behind by the test ``nodeid``.
+    """
+
+    def __init__(self, nodeid, kind, description):
+        self.nodeid = nodeid
+        self.kind = kind
+        self.description = description
+
+    def format(self):
+        return "leaked {kind}: {description}".format(
+            kind=self.kind, description=self.description)
+
+
+class LeakDetector:
+
+    """
+    detects pending tasks, running TestServers, open TestClients and
+    unclosed sockets or transports left behind by tests, and attributes
+    them to the test which created them.
+
+    Servers and clients are only reported once their event loop is closed,
+    resources of a loop shared by several tests may be kept on purpose.
+    """
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.nodeid = None
+        self.leaks = []
+        self._pending = []
+        self._resources = weakref.WeakKeyDictionary()
+
+    def start(self):
+        global DETECTOR
+        DETECTOR = self
+
+    def stop(self):
+        global DETECTOR
+        if DETECTOR is self:
+            DETECTOR = None
+
+    def track(self, resource):
+        self._resources[resource] = self.nodeid
+
+    def _record(self, kind, description, nodeid=None):
+        leak = Leak(nodeid or self.nodeid, kind, description)
+        self.leaks.append(leak)
+        self._pending.append(leak)
+
+    def check_tasks(self, loop):
+        """
+        Record (and cancel) the tasks still pending on a loop about to be
+        closed.
+        """
+        for task in cancel_pending_tasks(loop):
+            self._record('task', repr(task))
+
+    def check_resources(self):
+        """
+        Record the servers and clients created by the current test which
+        are still open, while their event loop is closed.
+        """
+        for resource, nodeid in list(self._resources.items()):
+            if nodeid != self.nodeid:
+                continue
+            description = _describe(resource)
+            if description is not None:
+                self._record('server' if hasattr(resource, 'connections')
+                             else 'client', description)
+                del self._resources[resource]
+
+    @contextmanager
+    def catch_unclosed(self):
+        """
+        Record the ResourceWarnings (unclosed sockets, transports, event
+        loops) raised in the block, or by garbage collected at its end.
+        """
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            try:
+                yield
+            finally:
+                gc.collect()
+        for warning in caught:
+            if issubclass(warning.category, ResourceWarning):
+                self._record('resource', str(warning.message))
+            else:
+                warnings.warn_explicit(
+                    warning.message, warning.category,
+                    warning.filename, warning.lineno)
+
+    def check(self, report):
+        """
+        Fail a (passing) teardown report with the leaks of its test, when
+        failing on leaks.
+        """
+        if report.when != 'teardown':
+            return
+        pending, self._pending = self._pending, []
+        if pending and self.fail and report.passed:
+            report.outcome = 'failed'
+            report.longrepr = '\n'.join(leak.format() for leak in pending)
+
+    def report(self, terminalreporter):
+        if not self.leaks:
+            return
+        terminalreporter.write_sep('=', 'sanic leaks')
+        for leak in self.leaks:
+            terminalreporter.write_line(
+                '{nodeid}  {leak}'.format(
+                    nodeid=leak.nodeid, leak=leak.format()))
+
+
+def _describe(resource):
+    """
+    Describe a server or client still open while its loop is closed, None
+    when it is not leaked.
+    """
+    if hasattr(resource, 'connections'):
+        if not resource.is_running or not resource.loop.is_closed():
+            return None
+        return "{name} on {url} with {count} open connection(s)".format(
+            name=type(resource).__name__,
+            url=resource.make_url('/'),
+            count=len(resource.connections or ()),
+        )
+    if resource._closed or not resource.server.loop.is_closed():
+        return None
+    return "{name} of app {app!r} not closed".format(
+        name=type(resource).__name__, app=resource.app.name)
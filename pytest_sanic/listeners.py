@@ -0,0 +1,246 @@
+import time
+import asyncio
+
+from inspect import isawaitable
+
+
+# run all server listeners concurrently (--sanic-concurrent-listeners),
+# TestServer(concurrent_listeners=...) takes precedence.
+CONCURRENT = False
+
+# the running timer, TestServer reports the listeners it runs to it.
+TIMER = None
+
+# listeners in the timing report.
+TOP = 20
+
+# events whose listeners stop what the start events set up, dependencies
+# run the other way round there.
+STOP_EVENTS = ('before_server_stop', 'after_server_stop')
+
+_INDEPENDENT = '_sanic_independent'
+_DEPENDS_ON = '_sanic_depends_on'
+
+
+def independent(listener):
+    """
+    Mark a server listener as independent: it runs concurrently with the
+    other independent listeners of its event.
+    """
+    setattr(listener, _INDEPENDENT, True)
+    return listener
+
+
+def depends_on(*dependencies):
+    """
+    Mark a server listener as independent, but started after the listeners
+    it depends on, and stopped before them.
+    """
+    def decorator(listener):
+        setattr(listener, _INDEPENDENT, True)
+        setattr(listener, _DEPENDS_ON, dependencies)
+        return listener
+    return decorator
+
+
+def record(timing):
+    if TIMER is not None:
+        TIMER.record(timing)
+
+
+def _function(listener):
+    # listeners are bound to their app with functools.partial.
+    return getattr(listener, 'func', listener)
+
+
+def _name(listener):
+    function = _function(listener)
+    return getattr(function, '__qualname__', None) or repr(function)
+
+
+class ListenerTiming:
+
+    """
+    how long a server listener took to run.
+    """
+
+    def __init__(self, event, name, elapsed, nodeid=None):
+        self.event = event
+        self.name = name
+        self.elapsed = elapsed
+        self.nodeid = nodeid
+
+    def __repr__(self):
+        return "<ListenerTiming {event} {name} {elapsed:.6f}s>".format(
+            event=self.event, name=self.name, elapsed=self.elapsed)
+
+
+async def _run_listener(listener, loop, event, timings):
+    started = time.perf_counter()
+    try:
+        result = listener(loop)
+        if isawaitable(result):
+            await result
+    finally:
+        timing = ListenerTiming(event, _name(listener),
+                                time.perf_counter() - started)
+        if TIMER is not None:
+            timing.nodeid = TIMER.nodeid
+        if timings is not None:
+            timings.append(timing)
+        record(timing)
+
+
+def _dependencies(listeners, stop=False):
+    """
+    For every listener, the listeners (by index) it waits for as declared
+    with ``depends_on``: its dependencies, or its dependents on ``stop``
+    events.
+    """
+    functions = [_function(listener) for listener in listeners]
+    index = {}
+    for position, function in enumerate(functions):
+        index.setdefault(function, position)
+    waits = [set() for _ in listeners]
+    for position, function in enumerate(functions):
+        for dependency in getattr(function, _DEPENDS_ON, ()):
+            other = index.get(_function(dependency))
+            if other is None or other == position:
+                continue
+            if stop:
+                waits[other].add(position)
+            else:
+                waits[position].add(other)
+    return waits
+
+
+def _sorted(listeners, stop=False):
+    """
+    The listeners in event order, but for those waiting for others they
+    depend on (or their dependents on ``stop`` events), which are moved
+    after them. Dependencies in a cycle raise ValueError.
+    """
+    waits = _dependencies(listeners, stop)
+    order = []
+    done = set()
+    while len(order) < len(listeners):
+        ready = [position for position in range(len(listeners))
+                 if position not in done and waits[position] <= done]
+        if not ready:
+            raise ValueError(
+                "listeners depend on each other: {names}".format(
+                    names=', '.join(
+                        _name(listeners[position])
+                        for position in range(len(listeners))
+                        if position not in done)))
+        order.append(ready[0])
+        done.add(ready[0])
+    return [listeners[position] for position in order]
+
+
+def _prerequisites(listeners, concurrent, stop=False):
+    """
+    For every listener, the listeners (by index) it waits for. Listeners
+    which are not independent keep their place in the event order, the
+    others wait for the listeners they depend on (see _dependencies), and
+    once _sorted, only ever for listeners before them.
+    """
+    waits = _dependencies(listeners, stop)
+    barrier = None
+    for position, listener in enumerate(listeners):
+        if concurrent or getattr(_function(listener), _INDEPENDENT, False):
+            if barrier is not None:
+                waits[position].add(barrier)
+        else:
+            waits[position].update(range(position))
+            barrier = position
+    return waits
+
+
+async def run_listeners(listeners, loop, concurrent=False, event=None,
+                        timings=None):
+    """
+    Run the listeners of a server event, one after another unless they are
+    marked independent (or ``concurrent`` is set), in which case they run
+    concurrently. A listener declaring dependencies runs after them, or
+    before them on ``STOP_EVENTS``, whatever their order; dependencies in
+    a cycle raise ValueError.
+
+    :param timings: list the ListenerTiming of every listener is added to
+    """
+    listeners = list(listeners)
+    if not concurrent and not any(
+            getattr(_function(listener), _INDEPENDENT, False)
+            for listener in listeners):
+        for listener in listeners:
+            await _run_listener(listener, loop, event, timings)
+        return
+
+    async def run_after(prerequisites, listener):
+        if prerequisites:
+            await asyncio.gather(*prerequisites)
+        await _run_listener(listener, loop, event, timings)
+
+    stop = event in STOP_EVENTS
+    listeners = _sorted(listeners, stop)
+    tasks = []
+    waits = _prerequisites(listeners, concurrent, stop)
+    for listener, prerequisites in zip(listeners, waits):
+        tasks.append(loop.create_task(run_after(
+            [tasks[position] for position in sorted(prerequisites)],
+            listener)))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+class ListenerTimer:
+
+    """
+    collects how long server listeners take to run, over all tests, and
+    reports the slowest of them.
+    """
+
+    def __init__(self, top=TOP):
+        self.top = top
+        self.nodeid = None
+        self.timings = []
+
+    def start(self):
+        global TIMER
+        TIMER = self
+
+    def stop(self):
+        global TIMER
+        if TIMER is self:
+            TIMER = None
+
+    def record(self, timing):
+        self.timings.append(timing)
+
+    def summary(self):
+        """
+        ``(event, name, runs, total, max)`` per listener, the slowest first.
+        """
+        listeners = {}
+        for timing in self.timings:
+            listeners.setdefault(
+                (timing.event, timing.name), []).append(timing.elapsed)
+        return sorted(
+            ((event, name, len(elapsed), sum(elapsed), max(elapsed))
+             for (event, name), elapsed in listeners.items()),
+            key=lambda row: row[3], reverse=True)
+
+    def report(self, terminalreporter):
+        if not self.timings:
+            return
+        terminalreporter.write_sep('=', 'sanic listener timings')
+        terminalreporter.write_line(
+            '{total:>10} {max:>10} {runs:>6}  {event:<20} listener'.format(
+                total='total(s)', max='max(s)', runs='runs', event='event'))
+        for event, name, runs, total, slowest in self.summary()[:self.top]:
+            terminalreporter.write_line(
+                '{total:>10.4f} {max:>10.4f} {runs:>6}  {event:<20} '
+                '{name}'.format(total=total, max=slowest, runs=runs,
+                                event=event, name=name))
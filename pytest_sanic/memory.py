@@ -0,0 +1,152 @@
+import tracemalloc
+
+from collections import Counter
+from contextlib import contextmanager
+
+
+# the tracker of the sanic_memory fixture, measuring the requests of every
+# TestClient.
+TRACKER = None
+
+# allocations made on the client side of in-process requests, or by
+# pytest and imports, left out so that what remains is down to the
+# application.
+CLIENT_PATTERNS = (
+    '*/httpx/*',
+    '*/httpcore/*',
+    '*/h11/*',
+    '*/anyio/*',
+    '*/sniffio/*',
+    '*/_pytest/*',
+    '*/pluggy/*',
+    '*/pytest_sanic/*',
+    '<frozen importlib.*',
+    '<unknown>',
+)
+
+
+class RequestMemory:
+
+    """
+    memory of a request, in bytes: ``allocated`` is still allocated once
+    the response is received, ``peak`` is the most traced at once during
+    the request, and ``top`` the largest ``(site, size)`` allocation sites.
+    """
+
+    def __init__(self, method, uri, allocated, peak, top):
+        self.method = method
+        self.uri = uri
+        self.allocated = allocated
+        self.peak = peak
+        self.top = top
+
+    def __repr__(self):
+        return "<RequestMemory {method} {uri} allocated={allocated} " \
+               "peak={peak}>".format(
+                   method=self.method, uri=self.uri,
+                   allocated=self.allocated, peak=self.peak)
+
+
+class MemoryTracker:
+
+    """
+    tracks the allocations of requests sent through TestClient, with
+    tracemalloc. The test server runs in the same process, so handler
+    allocations are measured along with the request.
+
+    Traces are cleared when a request starts, requests sent concurrently
+    are measured together.
+    """
+
+    def __init__(self, top=10, frames=1, exclude=CLIENT_PATTERNS):
+        self.top = top
+        self.frames = frames
+        self.requests = []
+        self._filters = [tracemalloc.Filter(False, pattern)
+                         for pattern in exclude]
+        self._started = False
+        self._inflight = 0
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @contextmanager
+    def measure(self, method, uri):
+        """
+        Measure a request sent in the block.
+        """
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        if not self._inflight:
+            tracemalloc.clear_traces()
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                self._filters)
+            stats = snapshot.statistics('lineno')
+            self.requests.append(RequestMemory(
+                method, uri,
+                allocated=sum(stat.size for stat in stats),
+                peak=peak,
+                top=[(str(stat.traceback), stat.size)
+                     for stat in stats[:self.top]],
+            ))
+
+    @property
+    def allocated(self):
+        """
+        Bytes allocated by all measured requests.
+        """
+        return sum(request.allocated for request in self.requests)
+
+    @property
+    def peak(self):
+        return max((request.peak for request in self.requests), default=0)
+
+    @property
+    def max_allocated(self):
+        """
+        Bytes allocated by the most allocating request.
+        """
+        return max(
+            (request.allocated for request in self.requests), default=0)
+
+    @property
+    def allocated_per_request(self):
+        if not self.requests:
+            return 0
+        return self.allocated / len(self.requests)
+
+    def top_sites(self, limit=None):
+        """
+        Largest allocation sites over all measured requests.
+        """
+        sites = Counter()
+        for request in self.requests:
+            for site, size in request.top:
+                sites[site] += size
+        return sites.most_common(limit or self.top)
+
+    def report(self):
+        lines = ["{count} requests, {allocated} bytes allocated "
+                 "({per:.0f} per request), peak {peak} bytes".format(
+                     count=len(self.requests),
+                     allocated=self.allocated,
+                     per=self.allocated_per_request,
+                     peak=self.peak)]
+        for site, size in self.top_sites():
+            lines.append("  {size:>10}  {site}".format(size=size, site=site))
+        return "\n".join(lines)
@@ -3,7 +3,14 @@ import pytest
 import inspect
 import socket
 import warnings
-from .utils import TestServer, TestClient
+from .bench import bench, ws_bench
+from .profiling import Profiler
+from .blocking import BlockingDetector
+from .leaks import LeakDetector, cancel_pending_tasks
+from .baseline import BaselineRecorder
+from .ports import worker_allocator, worker_count, worker_index
+from . import listeners
+from .listeners import ListenerTimer
 
 try:
     from async_generator import isasyncgenfunction
@@ -11,28 +18,145 @@ except ImportError:
     from inspect import isasyncgenfunction
 
 try:
-    import uvloop
-except:  # pragma: no cover
-    uvloop = None
+    from pytest import Package
+except ImportError:  # pytest < 7
+    from _pytest.python import Package
 
 
 LOOP_INIT = None
 LOOP_KEY = 'loop'
+LOOP_SCOPE = 'function'
+PARALLEL_FIXTURES = False
+BATCH = False
+PROFILER = None
+BLOCKING = None
+LEAKS = None
+BASELINE = None
+LISTENER_TIMER = None
+PORT_ALLOCATOR = None
+# PortAllocator arguments, until the allocator is built on first use.
+PORT_SETTINGS = None
+LOOP_SCOPES = ('function', 'module', 'package', 'session')
+# pytest scopes, from the narrowest to the widest.
+SCOPES = ('function', 'class', 'module', 'package', 'session')
+
+# shared event loops, keyed by the collector node owning them.
+_shared_loops = {}
+# server pools of the shared event loops, keyed the same way.
+_server_pools = {}
 
 def pytest_addoption(parser):
     parser.addoption(
         '--loop', default=None,
         help='run tests with specific loop: aioloop, uvloop')
+    parser.addoption(
+        '--sanic-parallel-fixtures', action='store_true', default=False,
+        help='set up independent asynchronous fixtures of a test '
+             'concurrently')
+    parser.addoption(
+        '--sanic-profile', action='store_true', default=False,
+        help='report wall and cpu time of async tests and fixtures')
+    parser.addoption(
+        '--sanic-profile-top', type=int, default=10,
+        help='number of tests and fixtures in the profile report')
+    parser.addoption(
+        '--sanic-cprofile', default=None, metavar='DIR',
+        help='dump a cProfile profile of every async test and fixture '
+             'into DIR (implies --sanic-profile)')
+    parser.addoption(
+        '--sanic-detect-blocking', type=float, default=None, metavar='MS',
+        help='fail tests whose event loop is blocked by a callback for '
+             'more than MS milliseconds')
+    parser.addoption(
+        '--sanic-blocking-report', default=None, metavar='PATH',
+        help='write blocking calls to a JSON report instead of failing '
+             'the tests')
+    parser.addoption(
+        '--sanic-detect-leaks', nargs='?', const='report', default=None,
+        choices=('report', 'fail'),
+        help='report (or fail on) tasks, servers, clients and sockets '
+             'left behind by tests')
+    parser.addoption(
+        '--sanic-baseline', default=None, metavar='NAME',
+        help='save test wall times, request latencies and server start/stop '
+             'times as a new round of the NAME baseline (in the pytest cache)')
+    parser.addoption(
+        '--sanic-compare', default=None, metavar='NAME',
+        help='report metrics regressing against the NAME baseline')
+    parser.addoption(
+        '--sanic-compare-fail', action='store_true', default=False,
+        help='fail tests whose metrics regress against --sanic-compare')
+    parser.addoption(
+        '--sanic-compare-tolerance', type=float, default=0.25,
+        metavar='FRACTION',
+        help='smallest relative slowdown taken for a regression '
+             '(default: 0.25)')
+    parser.addoption(
+        '--sanic-concurrent-listeners', action='store_true', default=False,
+        help='run all listeners of a server event concurrently, not only '
+             'those marked independent')
+    parser.addoption(
+        '--sanic-listener-timings', action='store_true', default=False,
+        help='report how long server listeners take to run')
+    parser.addoption(
+        '--sanic-port-base', type=int, default=None,
+        help='hand out unused ports from per-worker ranges starting at this '
+             'port (default: 20000 under pytest-xdist, otherwise any free '
+             'port)')
+    parser.addoption(
+        '--sanic-loop-scope', default='function', choices=LOOP_SCOPES,
+        help='share one event loop per function, module, package or '
+             'session (default: function)')
+    parser.addoption(
+        '--sanic-batch', action='store_true', default=False,
+        help='run function scoped async tests in batch on one long-lived '
+             'event loop, checking every test for leaked tasks')
 
 
 def pytest_configure(config):
-    global LOOP_INIT
+    global LOOP_INIT, LOOP_SCOPE, PARALLEL_FIXTURES, PROFILER, BLOCKING
+    global PORT_ALLOCATOR, PORT_SETTINGS, BATCH, LEAKS, BASELINE
+    global LISTENER_TIMER
+    config.addinivalue_line(
+        'markers',
+        'sanic_loop_scope(scope): run the test in an event loop shared at '
+        'the given scope: function, module, package or session.')
+    config.addinivalue_line(
+        'markers',
+        'sanic_parallel_fixtures: set up (and tear down) the independent '
+        'asynchronous fixtures of the test concurrently.')
+    config.addinivalue_line(
+        'markers',
+        'sanic_batch: run the test on the long-lived event loop shared by '
+        'batched tests, instead of a loop of its own.')
+    LOOP_SCOPE = config.getoption('--sanic-loop-scope')
+    PARALLEL_FIXTURES = config.getoption('--sanic-parallel-fixtures')
+    BATCH = config.getoption('--sanic-batch')
+    PROFILER = None
+    cprofile_dir = config.getoption('--sanic-cprofile')
+    if config.getoption('--sanic-profile') or cprofile_dir:
+        PROFILER = Profiler(
+            top=config.getoption('--sanic-profile-top'),
+            cprofile_dir=cprofile_dir)
+    PORT_ALLOCATOR = None
+    PORT_SETTINGS = None
+    port_base = config.getoption('--sanic-port-base')
+    worker = worker_index()
+    if port_base is not None or worker is not None:
+        PORT_SETTINGS = {'worker': worker, 'workers': worker_count()}
+        if port_base is not None:
+            PORT_SETTINGS['base'] = port_base
     loop_name = config.getoption('--loop')
     factory = {
         "aioloop": asyncio.new_event_loop,
     }
-    if uvloop is not None:
-        factory["uvloop"] = uvloop.new_event_loop
+    if loop_name == "uvloop":
+        try:
+            import uvloop
+        except ImportError:  # pragma: no cover
+            pass
+        else:
+            factory["uvloop"] = uvloop.new_event_loop
 
     if loop_name:
         if loop_name not in factory:
@@ -43,16 +167,90 @@ def pytest_configure(config):
     else:
         LOOP_INIT = factory["aioloop"]
 
+    BLOCKING = None
+    threshold = config.getoption('--sanic-detect-blocking')
+    if threshold is not None:
+        BLOCKING = BlockingDetector(
+            threshold / 1000.0,
+            report_path=config.getoption('--sanic-blocking-report'))
+        LOOP_INIT = BLOCKING.loop_factory(LOOP_INIT)
+        BLOCKING.start()
+
+    LEAKS = None
+    leaks = config.getoption('--sanic-detect-leaks')
+    if leaks is not None:
+        LEAKS = LeakDetector(fail=leaks == 'fail')
+        LEAKS.start()
+
+    BASELINE = None
+    save = config.getoption('--sanic-baseline')
+    compare = config.getoption('--sanic-compare')
+    if save is not None and hasattr(config, 'workerinput'):
+        raise pytest.UsageError(
+            "--sanic-baseline is not supported under pytest-xdist, workers "
+            "would overwrite each other's rounds.")
+    if save is not None or compare is not None:
+        BASELINE = BaselineRecorder(
+            getattr(config, 'cache', None), save=save, compare=compare,
+            fail=config.getoption('--sanic-compare-fail'),
+            tolerance=config.getoption('--sanic-compare-tolerance'))
+        BASELINE.start()
+
+    listeners.CONCURRENT = config.getoption('--sanic-concurrent-listeners')
+    LISTENER_TIMER = None
+    if config.getoption('--sanic-listener-timings'):
+        LISTENER_TIMER = ListenerTimer()
+        LISTENER_TIMER.start()
+
+
+def pytest_unconfigure(config):
+    if BLOCKING is not None:
+        BLOCKING.stop()
+        if BLOCKING.report_path:
+            BLOCKING.write_report()
+    if LEAKS is not None:
+        LEAKS.stop()
+    if BASELINE is not None:
+        BASELINE.stop()
+    if LISTENER_TIMER is not None:
+        LISTENER_TIMER.stop()
+    listeners.CONCURRENT = False
+
+
+def pytest_sessionfinish(session):
+    if BASELINE is not None:
+        BASELINE.save()
+
 
 @pytest.fixture
-def loop():
+def loop(request):
     """
     Default event loop, you should only use this event loop in your tests.
+
+    The loop is created per test, unless a wider scope is requested with
+    ``--sanic-loop-scope`` or the ``sanic_loop_scope`` marker, in which case
+    tests of the same module, package or session share one loop.
+
+    In batch mode (``--sanic-batch`` or the ``sanic_batch`` marker), tests
+    run on one long-lived loop instead, and fail if they leak tasks.
     """
-    loop = LOOP_INIT()
-    asyncio.set_event_loop(loop)
-    yield loop
-    loop.close()
+    scope = _loop_scope(request.node)
+    if scope == 'function' and _is_batched(request.node):
+        loop = _get_shared_loop(request.node, 'session')
+        asyncio.set_event_loop(loop)
+        yield loop
+        _check_leaked_tasks(loop, request.node.nodeid)
+    elif scope == 'function':
+        loop = LOOP_INIT()
+        asyncio.set_event_loop(loop)
+        yield loop
+        if LEAKS is not None:
+            LEAKS.check_tasks(loop)
+        loop.close()
+    else:
+        loop = _get_shared_loop(request.node, scope)
+        asyncio.set_event_loop(loop)
+        yield loop
 
 
 def pytest_pycollect_makeitem(collector, name, obj):
@@ -60,33 +258,114 @@ def pytest_pycollect_makeitem(collector, name, obj):
     pytest should also collect coroutines.
     """
     if collector.funcnamefilter(name) and _is_coroutine(obj):
-        return list(collector._genfunctions(name, obj))
+        items = list(collector._genfunctions(name, obj))
+        if not items:
+            return items
+        # parametrized items share their fixture closure, the loop only
+        # needs to be appended to it once.
+        fixturenames = items[0].fixturenames
+        if LOOP_KEY not in fixturenames:
+            fixturenames.append(LOOP_KEY)
+        argnames = tuple(items[0]._fixtureinfo.argnames)
+        for item in items:
+            item._sanic_coroutine = True
+            item._sanic_argnames = argnames
+        return items
+
+
+def pytest_itemcollected(item):
+    """
+    Classify the other tests once too, and append the loop fixture to them.
+    """
+    if hasattr(item, '_sanic_coroutine'):
+        return
+    function = getattr(item, 'function', None)
+    item._sanic_coroutine = function is not None and _is_coroutine(function)
+    _append_loop(item)
 
 
 def pytest_pyfunc_call(pyfuncitem):
     """
     Run test coroutines in an event loop.
     """
-    if _is_coroutine(pyfuncitem.function):
+    is_coroutine = getattr(pyfuncitem, '_sanic_coroutine', None)
+    if is_coroutine is None:
+        is_coroutine = _is_coroutine(pyfuncitem.function)
+    if is_coroutine:
         loop = pyfuncitem.funcargs[LOOP_KEY]
         funcargs = pyfuncitem.funcargs
-        testargs = {}
-        for arg in pyfuncitem._fixtureinfo.argnames:
-            testargs[arg] = funcargs[arg]
-        loop.run_until_complete(
+        argnames = getattr(pyfuncitem, '_sanic_argnames', None)
+        if argnames is None:
+            argnames = pyfuncitem._fixtureinfo.argnames
+        testargs = {arg: funcargs[arg] for arg in argnames}
+        _run(
+            loop,
             loop.create_task(
                 pyfuncitem.obj(**testargs)
-            )
+            ),
+            pyfuncitem.nodeid,
         )
         return True
 
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    if BLOCKING is not None:
+        BLOCKING.nodeid = item.nodeid
+    if LEAKS is not None:
+        LEAKS.nodeid = item.nodeid
+    if BASELINE is not None:
+        BASELINE.nodeid = item.nodeid
+    if LISTENER_TIMER is not None:
+        LISTENER_TIMER.nodeid = item.nodeid
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    if LEAKS is None:
+        yield
+        return
+    with LEAKS.catch_unclosed():
+        yield
+    LEAKS.check_resources()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    if BLOCKING is not None:
+        BLOCKING.check(outcome.get_result())
+    if LEAKS is not None:
+        LEAKS.check(outcome.get_result())
+    if BASELINE is not None:
+        report = outcome.get_result()
+        if report.when == 'call' and report.passed:
+            BASELINE.record('wall', report.duration)
+        BASELINE.check(report)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if PROFILER is not None:
+        PROFILER.report(terminalreporter)
+    if BLOCKING is not None:
+        BLOCKING.report(terminalreporter)
+    if LEAKS is not None:
+        LEAKS.report(terminalreporter)
+    if BASELINE is not None:
+        BASELINE.report(terminalreporter)
+    if LISTENER_TIMER is not None:
+        LISTENER_TIMER.report(terminalreporter)
+
+
 def pytest_fixture_setup(fixturedef):
     """
     Allow fixtures to be coroutines. Run coroutine fixtures in an event loop.
     """
     if isasyncgenfunction(fixturedef.func):
         func = fixturedef.func
+        fixturedef._sanic_func = func
+        fixturedef._sanic_argnames = fixturedef.argnames
 
         strip_request = False
         if 'request' not in fixturedef.argnames:
@@ -99,30 +378,35 @@ def pytest_fixture_setup(fixturedef):
             if strip_request:
                 del kwargs['request']
 
-            if 'loop' not in request.fixturenames:
-                raise Exception(
-                    "Asynchronous fixtures must depend on the 'loop' fixture or "
-                    "be used in tests depending from it."
-                )
+            loop = _fixture_loop(request)
+            task = _parallel_setup(fixturedef, request, loop, kwargs)
+            if task is not None:
+                # set up (and torn down) along with the other fixtures.
+                return task.result()
 
-            loop = request.getfixturevalue('loop')
             # for async generators, we need to advance the generator once,
             # then advance it again in a finalizer
             gen = func(*args, **kwargs)
 
+            nodeid = request._pyfuncitem.nodeid
+
             def finalizer():
                 try:
-                    return loop.run_until_complete(gen.__anext__())
+                    return _run(loop, gen.__anext__(), nodeid,
+                                fixturedef.argname, 'teardown')
                 except StopAsyncIteration:  # NOQA
                     pass
 
             request.addfinalizer(finalizer)
-            return loop.run_until_complete(gen.__anext__())
+            return _run(loop, gen.__anext__(), nodeid,
+                        fixturedef.argname, 'setup')
 
         fixturedef.func = wrapper
 
     elif asyncio.iscoroutinefunction(fixturedef.func):
         func = fixturedef.func
+        fixturedef._sanic_func = func
+        fixturedef._sanic_argnames = fixturedef.argnames
 
         strip_request = False
         if 'request' not in fixturedef.argnames:
@@ -131,18 +415,18 @@ def pytest_fixture_setup(fixturedef):
 
         def wrapper(*args, **kwargs):
             request = kwargs['request']
-            if 'loop' not in request.fixturenames:
-                raise Exception(
-                    "Asynchronous fixtures must depend on the 'loop' fixture or "
-                    "be used in tests depending from it."
-                )
-
-            loop = request.getfixturevalue('loop')
+            loop = _fixture_loop(request)
 
             if strip_request:
                 del kwargs['request']
 
-            return loop.run_until_complete(func(*args, **kwargs))
+            task = _parallel_setup(fixturedef, request, loop, kwargs)
+            if task is not None:
+                return task.result()
+
+            return _run(loop, func(*args, **kwargs),
+                        request._pyfuncitem.nodeid, fixturedef.argname,
+                        'setup')
 
         fixturedef.func = wrapper
 
@@ -154,17 +438,60 @@ def pytest_runtest_setup(item):
     """
     append a loop fixture to all test func.
     """
+    if hasattr(item, '_sanic_coroutine'):
+        # already appended at collection time.
+        return
+    _append_loop(item)
+
+
+def _append_loop(item):
     if hasattr(item, 'fixturenames') and LOOP_KEY not in item.fixturenames:
         item.fixturenames.append(LOOP_KEY)
 
 
+def _port_allocator():
+    """
+    The PortAllocator of the current worker, built on first use, or None
+    when ports are picked by the OS.
+    """
+    global PORT_ALLOCATOR, PORT_SETTINGS
+    if PORT_SETTINGS is not None:
+        settings, PORT_SETTINGS = PORT_SETTINGS, None
+        PORT_ALLOCATOR = worker_allocator(**settings)
+    return PORT_ALLOCATOR
+
+
 @pytest.fixture
 def unused_port():
+    """
+    An unused TCP port on the localhost, from the range reserved to the
+    current worker under pytest-xdist.
+    """
+    allocator = _port_allocator()
+    if allocator is not None:
+        return allocator.port()
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.bind(('127.0.0.1', 0))
         return s.getsockname()[1]
 
 
+@pytest.fixture
+def unused_socket():
+    """
+    A TCP socket bound to an unused port on the localhost, which can be
+    handed over to a server (``test_server(app, sock=unused_socket)``) so
+    that the port is never released in between.
+    """
+    allocator = _port_allocator()
+    if allocator is not None:
+        sock = allocator.bind()
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('127.0.0.1', 0))
+    yield sock
+    sock.close()
+
+
 @pytest.fixture
 def test_server(loop):
     """
@@ -173,6 +500,8 @@ def test_server(loop):
     test_server(app, **kwargs)
     """
 
+    from .utils import TestServer
+
     servers = []
 
     async def create_server(app, **kwargs):
@@ -189,6 +518,66 @@ def test_server(loop):
             loop.run_until_complete(server.close())
 
 
+@pytest.fixture
+def sanic_server_pool(request):
+    """
+    A pool of started TestServer instances, keyed by application, which
+    lives as long as the event loop of the test (``--sanic-loop-scope`` or
+    the ``sanic_loop_scope`` marker).
+
+    sanic_server_pool.acquire(app, key=None, **kwargs)
+    """
+    from .utils import ServerPool
+
+    scope = _loop_scope(request.node)
+    if scope != 'function':
+        yield _get_server_pool(request.node, scope)
+        return
+
+    loop = request.getfixturevalue(LOOP_KEY)
+    pool = ServerPool()
+
+    yield pool
+
+    loop.run_until_complete(pool.close())
+
+
+@pytest.fixture(scope='session')
+def _sanic_app_cache():
+    from .utils import AppCache
+
+    return AppCache()
+
+
+@pytest.fixture
+def sanic_app_factory(_sanic_app_cache):
+    """
+    Build a Sanic application from a factory. Cached applications are built
+    and finalized once per session, and restored (config, ctx, listeners,
+    middleware) before and after every test using them.
+
+    sanic_app_factory(factory, cached=True, key=None, config=None, ctx=None)
+    """
+    from .utils import _override
+
+    keys = []
+
+    def create_app(factory, cached=True, key=None, config=None, ctx=None):
+        if not cached:
+            app = factory()
+            _override(app, config=config, ctx=ctx)
+            return app
+        if key is None:
+            key = factory
+        keys.append(key)
+        return _sanic_app_cache.get(factory, key=key, config=config, ctx=ctx)
+
+    yield create_app
+
+    for key in keys:
+        _sanic_app_cache.restore(key)
+
+
 @pytest.fixture
 def sanic_client(loop):
     """
@@ -196,6 +585,8 @@ def sanic_client(loop):
 
     test_client(app, **kwargs)
     """
+    from .utils import TestClient
+
     clients = []
 
     async def create_client(app, **kwargs):
@@ -212,11 +603,119 @@ def sanic_client(loop):
             loop.run_until_complete(client.close())
 
 
+@pytest.fixture
+def sanic_bench(loop):
+    """
+    Benchmark a route, reporting throughput and latency percentiles.
+
+    sanic_bench(client_or_app, uri, method='GET', requests=100,
+                concurrency=10, warmup=0, **kwargs)
+    """
+    from .utils import TestClient
+
+    clients = []
+
+    async def run_bench(client, uri, **kwargs):
+        if not isinstance(client, TestClient):
+            client = TestClient(client)
+            await client.start_server()
+            clients.append(client)
+        return await bench(client, uri, **kwargs)
+
+    yield run_bench
+
+    # Clean up
+    if clients:
+        for client in clients:
+            loop.run_until_complete(client.close())
+
+
+@pytest.fixture
+def sanic_ws_bench(loop):
+    """
+    Benchmark a websocket route over many concurrent connections, reporting
+    message throughput and latency percentiles.
+
+    sanic_ws_bench(client_or_app, uri, connections=10, messages=100,
+                   rate=None, payload='ping', warmup=0, timeout=10.0,
+                   **kwargs)
+    """
+    from sanic.websocket import WebSocketProtocol
+    from .utils import TestClient
+
+    clients = []
+
+    async def run_bench(client, uri, **kwargs):
+        if not isinstance(client, TestClient):
+            client = TestClient(
+                client, scheme='ws', protocol=WebSocketProtocol)
+            await client.start_server()
+            clients.append(client)
+        return await ws_bench(client, uri, **kwargs)
+
+    yield run_bench
+
+    # Clean up
+    if clients:
+        for client in clients:
+            loop.run_until_complete(client.close())
+
+
+@pytest.fixture
+def sanic_proxy(loop):
+    """
+    Put a network shaping proxy in front of a TestServer, or of the server
+    of a TestClient, whose requests then go through the proxy.
+
+    sanic_proxy(client_or_server, latency=0.0, jitter=0.0, bandwidth=None,
+                chunk_size=None, reset_after=None, seed=None)
+    """
+    from .proxy import NetworkProxy
+    from .utils import TestClient
+
+    proxies = []
+
+    async def create_proxy(target, **kwargs):
+        client = target if isinstance(target, TestClient) else None
+        proxy = NetworkProxy(client.server if client else target, **kwargs)
+        await proxy.start()
+        proxies.append(proxy)
+        if client is not None:
+            client.proxy = proxy
+        return proxy
+
+    yield create_proxy
+
+    # Clean up
+    if proxies:
+        for proxy in proxies:
+            loop.run_until_complete(proxy.close())
+
+
+@pytest.fixture
+def sanic_memory():
+    """
+    Measure the allocations of every request sent through a TestClient
+    during the test, with tracemalloc.
+    """
+    from . import memory
+
+    tracker = memory.MemoryTracker()
+    with tracker:
+        memory.TRACKER = tracker
+        try:
+            yield tracker
+        finally:
+            memory.TRACKER = None
+
+
 @pytest.fixture
 def test_client(loop):
     warnings.warn("test_client is deprecated, please use sanic_client instead.",
                   DeprecationWarning,
                   stacklevel=2)
+    from .utils import TestClient
+
     clients = []
 
     async def create_client(app, **kwargs):
@@ -236,3 +735,262 @@ def test_client(loop):
 # Helper Functions
 def _is_coroutine(obj):
     return asyncio.iscoroutinefunction(obj) or inspect.isgeneratorfunction(obj)
+
+
+def _run(loop, coro, nodeid, fixture=None, phase='call'):
+    """
+    Run a test (or fixture) coroutine until complete, profiled with
+    ``--sanic-profile``.
+    """
+    if PROFILER is None:
+        return loop.run_until_complete(coro)
+    return PROFILER.run(loop, coro, nodeid, fixture, phase)
+
+
+def _loop_scope(item):
+    """
+    Loop scope of a test item, the ``sanic_loop_scope`` marker wins over
+    the ``--sanic-loop-scope`` option.
+    """
+    marker = item.get_closest_marker('sanic_loop_scope')
+    if marker is None:
+        return LOOP_SCOPE
+    scope = marker.args[0] if marker.args else marker.kwargs.get('scope')
+    if scope not in LOOP_SCOPES:
+        raise ValueError(
+            "{scope} is not valid loop scope".format(scope=scope)
+        )
+    return scope
+
+
+def _is_batched(item):
+    return BATCH or item.get_closest_marker('sanic_batch') is not None
+
+
+def _check_leaked_tasks(loop, nodeid):
+    """
+    Cancel the tasks a test left pending on a shared loop, and fail it.
+    """
+    tasks = cancel_pending_tasks(loop)
+    if not tasks:
+        return
+    raise Exception(
+        "{nodeid} leaked {count} pending task(s) on the shared event "
+        "loop:\n{tasks}".format(
+            nodeid=nodeid,
+            count=len(tasks),
+            tasks="\n".join("  {task!r}".format(task=task)
+                            for task in tasks),
+        )
+    )
+
+
+def _scope_node(item, scope):
+    if scope == 'session':
+        return item.session
+    if scope == 'package':
+        return item.getparent(Package) or item.session
+    if scope == 'module':
+        return item.getparent(pytest.Module)
+    return item
+
+
+def _get_shared_loop(item, scope):
+    """
+    Get (or create) the event loop shared by all tests under the node of
+    the given scope, the loop is closed when that node is torn down.
+    """
+    node = _scope_node(item, scope)
+    loop = _shared_loops.get(node)
+    if loop is None:
+        loop = LOOP_INIT()
+        _shared_loops[node] = loop
+
+        def finalizer():
+            _shared_loops.pop(node, None)
+            loop.close()
+
+        node.addfinalizer(finalizer)
+    return loop
+
+
+def _get_server_pool(item, scope):
+    """
+    Get (or create) the server pool of the event loop shared by all tests
+    under the node of the given scope, closed before that loop.
+    """
+    from .utils import ServerPool
+
+    node = _scope_node(item, scope)
+    pool = _server_pools.get(node)
+    if pool is None:
+        loop = _get_shared_loop(item, scope)
+        pool = ServerPool()
+        _server_pools[node] = pool
+
+        def finalizer():
+            _server_pools.pop(node, None)
+            loop.run_until_complete(pool.close())
+
+        node.addfinalizer(finalizer)
+    return pool
+
+
+def _fixture_loop(request):
+    """
+    Event loop an asynchronous fixture should run in.
+    """
+    item = request._pyfuncitem
+    loop_scope = _loop_scope(item)
+    if SCOPES.index(request.scope) > SCOPES.index(loop_scope):
+        raise Exception(
+            "Asynchronous fixture '{name}' has scope '{scope}', but the "
+            "event loop is '{loop_scope}' scoped, use --sanic-loop-scope or "
+            "the 'sanic_loop_scope' marker to widen it.".format(
+                name=request.fixturename,
+                scope=request.scope,
+                loop_scope=loop_scope,
+            )
+        )
+    if request.scope == 'function':
+        if LOOP_KEY not in request.fixturenames:
+            raise Exception(
+                "Asynchronous fixtures must depend on the 'loop' fixture or "
+                "be used in tests depending from it."
+            )
+        return request.getfixturevalue(LOOP_KEY)
+    return _get_shared_loop(item, loop_scope)
+
+
+def _fixture_func(fixturedef):
+    return getattr(fixturedef, '_sanic_func', fixturedef.func)
+
+
+def _fixture_argnames(fixturedef):
+    return getattr(fixturedef, '_sanic_argnames', fixturedef.argnames)
+
+
+def _is_async_fixture(fixturedef):
+    func = _fixture_func(fixturedef)
+    return isasyncgenfunction(func) or asyncio.iscoroutinefunction(func)
+
+
+def _independent_async_fixtures(item):
+    """
+    Function scoped asynchronous fixtures of the item closure, which are
+    not set up yet and do not depend (even indirectly) on another function
+    scoped asynchronous fixture.
+    """
+    name2fixturedefs = item._fixtureinfo.name2fixturedefs
+
+    def fixturedef_of(name):
+        fixturedefs = name2fixturedefs.get(name)
+        return fixturedefs[-1] if fixturedefs else None
+
+    def depends_on_async(fixturedef, seen):
+        for argname in _fixture_argnames(fixturedef):
+            dependency = fixturedef_of(argname)
+            if dependency is None or dependency in seen:
+                continue
+            seen.add(dependency)
+            if dependency.scope == 'function' and \
+                    _is_async_fixture(dependency):
+                return True
+            if depends_on_async(dependency, seen):
+                return True
+        return False
+
+    fixturedefs = []
+    for name in item.fixturenames:
+        fixturedef = fixturedef_of(name)
+        if fixturedef is None or fixturedef.scope != 'function':
+            continue
+        if not _is_async_fixture(fixturedef):
+            continue
+        if fixturedef.cached_result is not None:
+            continue
+        argnames = _fixture_argnames(fixturedef)
+        # fixtures using their own request (params, finalizers) or
+        # overriding a fixture of the same name run on their own.
+        if 'request' in argnames or name in argnames:
+            continue
+        if depends_on_async(fixturedef, {fixturedef}):
+            continue
+        fixturedefs.append(fixturedef)
+    return fixturedefs
+
+
+def _parallel_setup(fixturedef, request, loop, kwargs):
+    """
+    Set up the independent asynchronous fixtures of a test concurrently,
+    when the first of them is requested.
+
+    Returns the task which set ``fixturedef`` up, or None when it is not
+    part of a concurrent setup.
+    """
+    item = request._pyfuncitem
+    tasks = getattr(item, '_sanic_parallel_tasks', None)
+    if tasks is None:
+        if request.scope != 'function':
+            return None
+        if not (PARALLEL_FIXTURES or
+                item.get_closest_marker('sanic_parallel_fixtures')):
+            return None
+        fixturedefs = _independent_async_fixtures(item)
+        if fixturedef not in fixturedefs or len(fixturedefs) < 2:
+            return None
+
+        tasks = item._sanic_parallel_tasks = {}
+        generators = {}
+        for other in fixturedefs:
+            if other is fixturedef:
+                other_kwargs = kwargs
+            else:
+                # requested by the test itself, so that pytest checks their
+                # scope and finalizes them along with the test, not with
+                # the fixture being set up.
+                other_kwargs = dict(
+                    (argname, item._request.getfixturevalue(argname))
+                    for argname in _fixture_argnames(other)
+                )
+            func = _fixture_func(other)
+            if isasyncgenfunction(func):
+                gen = generators[other] = func(**other_kwargs)
+                coro = gen.__anext__()
+            else:
+                coro = func(**other_kwargs)
+            tasks[other] = loop.create_task(coro)
+        _run(loop, asyncio.wait(list(tasks.values())), item.nodeid,
+             _group_name(fixturedefs), 'setup')
+
+        started = [
+            gen for other, gen in generators.items()
+            if not tasks[other].cancelled() and
+            tasks[other].exception() is None
+        ]
+        if started:
+            item.addfinalizer(lambda: _parallel_teardown(
+                loop, started, item.nodeid, _group_name(fixturedefs)))
+    return tasks.pop(fixturedef, None)
+
+
+def _group_name(fixturedefs):
+    return '+'.join(fixturedef.argname for fixturedef in fixturedefs)
+
+
+def _parallel_teardown(loop, generators, nodeid, name):
+    """
+    Advance async generator fixtures to their end, concurrently.
+    """
+    async def finish(gen):
+        try:
+            await gen.__anext__()
+        except StopAsyncIteration:  # NOQA
+            pass
+
+    results = _run(loop, asyncio.gather(
+        *[finish(gen) for gen in generators], return_exceptions=True),
+        nodeid, name, 'teardown')
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
@@ -0,0 +1,140 @@
+import os
+import random
+import socket
+import warnings
+
+
+# per-worker port ranges start there, below the ephemeral port range the
+# OS picks from when binding port 0 (32768+ on Linux), so that reserved
+# ports never collide with TestServer sockets or client connections.
+PORT_BASE = 20000
+PORT_RANGE_SIZE = 300
+# the ephemeral port range, where it can't be read from the OS (IANA).
+EPHEMERAL_PORTS = (49152, 65535)
+MAX_PORT = 65535
+# ranges are shrunk to fit clear of the ephemeral port range with many
+# workers, down to that many ports, ports are left to the OS below that.
+MIN_RANGE_SIZE = 10
+
+
+def worker_index():
+    """
+    Index of the current pytest-xdist worker (``gw3`` is 3), or None when
+    not running under xdist.
+    """
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    if not worker:
+        return None
+    digits = ''.join(c for c in worker if c.isdigit())
+    return int(digits) if digits else 0
+
+
+def worker_count():
+    """
+    Number of pytest-xdist workers, or None when not running under xdist.
+    """
+    count = os.environ.get('PYTEST_XDIST_WORKER_COUNT')
+    return int(count) if count and count.isdigit() else None
+
+
+def ephemeral_port_range():
+    """
+    The ``(first, last)`` ports the OS picks from when binding port 0.
+    """
+    try:
+        with open('/proc/sys/net/ipv4/ip_local_port_range') as f:
+            first, last = f.read().split()
+        return int(first), int(last)
+    except (OSError, ValueError):
+        return EPHEMERAL_PORTS
+
+
+def worker_allocator(base=PORT_BASE, size=PORT_RANGE_SIZE, worker=None,
+                     workers=None, ephemeral=None):
+    """
+    The PortAllocator of the current worker, with ranges shrunk so that
+    those of all ``workers`` stay clear of the ephemeral port range, or None
+    (with a warning) when they can't, ports are then picked by the OS.
+    """
+    workers = max(workers or 1, (worker or 0) + 1)
+    first, last = ephemeral or ephemeral_port_range()
+    if base > last:
+        room = MAX_PORT + 1 - base
+    else:
+        room = first - base
+    fit = min(size, room // workers) if base >= 1 else 0
+    if fit < MIN_RANGE_SIZE:
+        warnings.warn(
+            "ports from {base} can't be split between {workers} workers "
+            "clear of the ephemeral port range {first}-{last}, unused ports "
+            "are picked by the OS instead.".format(
+                base=base, workers=workers, first=first, last=last))
+        return None
+    return PortAllocator(base=base, size=fit, worker=worker,
+                         workers=workers, ephemeral=(first, last))
+
+
+class PortAllocator:
+
+    """
+    hands out TCP ports from a range reserved to the current xdist worker,
+    so that workers never race for the same port.
+
+    The ranges of all ``workers`` should stay clear of the ephemeral port
+    range. Ports are probed (bound) before being handed out, and every run
+    starts at an offset of its own in the range (``seed``, the xdist test
+    run id by default), so that two runs on a host rarely race either.
+    """
+
+    def __init__(self, host='127.0.0.1', base=PORT_BASE,
+                 size=PORT_RANGE_SIZE, worker=None, workers=None,
+                 ephemeral=None, seed=None):
+        if size < 1:
+            raise ValueError("port range size should be a positive number.")
+        self.host = host
+        self.size = size
+        self.start = base + (worker or 0) * size
+        workers = max(workers or 1, (worker or 0) + 1)
+        end = base + workers * size - 1
+        first, last = ephemeral or ephemeral_port_range()
+        if base < 1 or end > MAX_PORT or (base <= last and end >= first):
+            raise ValueError(
+                "ports {base}-{end} of {workers} worker(s) should stay "
+                "clear of the ephemeral port range {first}-{last}, pick "
+                "another --sanic-port-base.".format(
+                    base=base, end=end, workers=workers, first=first,
+                    last=last))
+        if seed is None:
+            seed = os.environ.get('PYTEST_XDIST_TESTRUNUID') or os.getpid()
+        self._next = random.Random(seed).randrange(size)
+
+    @property
+    def ports(self):
+        return range(self.start, self.start + self.size)
+
+    def bind(self, host=None):
+        """
+        Return a socket bound to the next free port of the range, it stays
+        reserved for as long as the socket is open.
+        """
+        for _ in range(self.size):
+            port = self.start + self._next
+            self._next = (self._next + 1) % self.size
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                sock.bind((host or self.host, port))
+            except OSError:
+                sock.close()
+                continue
+            return sock
+        raise RuntimeError(
+            "no free port in {start}-{end}".format(
+                start=self.start, end=self.start + self.size - 1))
+
+    def port(self, host=None):
+        """
+        Return a free port of the range, ports are handed out round robin
+        so a released port is not handed out again right away.
+        """
+        with self.bind(host) as sock:
+            return sock.getsockname()[1]
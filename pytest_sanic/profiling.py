@@ -0,0 +1,111 @@
+import os
+import re
+import time
+import cProfile
+
+
+class Timing:
+
+    """
+    accumulated wall and cpu time (in seconds) of a measured step.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max = 0.0
+
+    def add(self, wall, cpu):
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max = max(self.max, wall)
+
+
+class Profiler:
+
+    """
+    records timings of coroutine tests and asynchronous fixtures, setup and
+    teardown apart, and optionally dumps a cProfile profile of each of them.
+    """
+
+    def __init__(self, top=10, cprofile_dir=None):
+        self.top = top
+        self.cprofile_dir = cprofile_dir
+        # nodeid -> Timing
+        self.tests = {}
+        # fixture name -> {phase -> Timing}
+        self.fixtures = {}
+
+    def run(self, loop, coro, nodeid, fixture=None, phase='call'):
+        """
+        Run ``coro`` until complete in ``loop`` and record how long it took,
+        for the test ``nodeid`` or for one of its fixtures.
+        """
+        profile = None
+        if self.cprofile_dir:
+            profile = cProfile.Profile()
+            profile.enable()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            if fixture is None:
+                self.tests.setdefault(nodeid, Timing()).add(wall, cpu)
+            else:
+                phases = self.fixtures.setdefault(fixture, {})
+                phases.setdefault(phase, Timing()).add(wall, cpu)
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(self._profile_path(nodeid, fixture, phase))
+
+    def _profile_path(self, nodeid, fixture, phase):
+        name = nodeid if fixture is None else "{nodeid}-{fixture}-{phase}".format(
+            nodeid=nodeid, fixture=fixture, phase=phase)
+        name = re.sub(r'[^\w.-]+', '_', name).strip('_')
+        os.makedirs(self.cprofile_dir, exist_ok=True)
+        return os.path.join(self.cprofile_dir, name + '.prof')
+
+    def slowest_tests(self):
+        return sorted(
+            self.tests.items(), key=lambda i: i[1].wall, reverse=True
+        )[:self.top]
+
+    def slowest_fixtures(self):
+        def total(item):
+            return sum(timing.wall for timing in item[1].values())
+
+        return sorted(self.fixtures.items(), key=total, reverse=True)[:self.top]
+
+    def report(self, terminalreporter):
+        """
+        Write the slowest tests and fixtures in the terminal summary.
+        """
+        write = terminalreporter.write_line
+        terminalreporter.write_sep('=', 'sanic profile')
+        write('slowest async tests (wall / cpu):')
+        for nodeid, timing in self.slowest_tests():
+            write('  {wall:8.3f}s {cpu:8.3f}s  {nodeid}'.format(
+                wall=timing.wall, cpu=timing.cpu, nodeid=nodeid))
+        write('slowest async fixtures (total wall, setup / teardown):')
+        for name, phases in self.slowest_fixtures():
+            setup = phases.get('setup', Timing())
+            teardown = phases.get('teardown', Timing())
+            write(
+                '  {total:8.3f}s  {name}: setup {setup:.3f}s '
+                '(calls {calls}, max {max:.3f}s), teardown {teardown:.3f}s'
+                .format(
+                    total=setup.wall + teardown.wall,
+                    name=name,
+                    setup=setup.wall,
+                    calls=setup.calls,
+                    max=setup.max,
+                    teardown=teardown.wall,
+                )
+            )
+        if self.cprofile_dir:
+            write('cProfile dumps written to {dir}'.format(
+                dir=self.cprofile_dir))
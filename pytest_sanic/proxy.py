@@ -0,0 +1,195 @@
+import random
+import asyncio
+
+
+# chunks queued per direction before the proxy stops reading, so that a
+# slow link pushes back on the sender as a real one would.
+QUEUE_SIZE = 16
+READ_SIZE = 65536
+
+
+class NetworkProxy:
+
+    """
+    an in-process TCP proxy in front of a TestServer, shaping the traffic
+    going through it in both directions.
+
+    :param latency: seconds every chunk is delayed by
+    :param jitter: random extra delay, between -jitter and +jitter seconds
+    :param bandwidth: bytes per second, per direction of each connection
+    :param chunk_size: split traffic into chunks of at most that many bytes
+    :param reset_after: abort connections once they carried that many bytes
+
+    Settings are read for every chunk, they can be changed while running.
+    """
+
+    def __init__(self, server, latency=0.0, jitter=0.0, bandwidth=None,
+                 chunk_size=None, reset_after=None, host='127.0.0.1',
+                 seed=None):
+        if server.unix or server.port is None:
+            raise ValueError("server should be listening on a TCP port.")
+        self.target = server
+        self.host = host
+        self.port = None
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.reset_after = reset_after
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.resets = 0
+        self._random = random.Random(seed)
+        self._server = None
+        self._connections = set()
+        self._handlers = set()
+
+    @property
+    def connections(self):
+        return len(self._connections)
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # closing is no reset, it is not counted in resets.
+            for connection in list(self._connections):
+                connection.abort()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def reset(self):
+        """
+        Abort all connections going through the proxy, now.
+        """
+        for connection in list(self._connections):
+            if not connection.aborted:
+                connection.abort()
+                self.resets += 1
+
+    def make_url(self, uri):
+        return "{scheme}://{host}:{port}{uri}".format(
+            scheme=self.target.scheme, host=self.host, port=self.port,
+            uri=uri)
+
+    def _count(self, direction, size):
+        if direction == 'sent':
+            self.bytes_sent += size
+        else:
+            self.bytes_received += size
+
+    def _delay(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+
+    async def _handle(self, client_reader, client_writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            await self._proxy(client_reader, client_writer)
+        finally:
+            self._handlers.discard(handler)
+
+    async def _proxy(self, client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(
+                self.target.host, self.target.port)
+        except OSError:
+            client_writer.transport.abort()
+            return
+        connection = _Connection(self, client_writer, server_writer)
+        self._connections.add(connection)
+        try:
+            await asyncio.gather(
+                connection.pipe(client_reader, server_writer, 'sent'),
+                connection.pipe(server_reader, client_writer, 'received'))
+        finally:
+            self._connections.discard(connection)
+            connection.abort()
+
+
+class _Connection:
+
+    """
+    a client connection through the proxy, and its server connection.
+    """
+
+    def __init__(self, proxy, client_writer, server_writer):
+        self.proxy = proxy
+        self.writers = (client_writer, server_writer)
+        self.carried = 0
+        self.aborted = False
+
+    def abort(self):
+        if not self.aborted:
+            self.aborted = True
+            for writer in self.writers:
+                writer.transport.abort()
+
+    async def pipe(self, reader, writer, direction):
+        """
+        Forward one direction: chunks are read as they come, and delivered
+        in order once delayed and paced to the bandwidth.
+        """
+        proxy = self.proxy
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue(QUEUE_SIZE)
+
+        async def deliver():
+            while True:
+                deliver_at, chunk = await queue.get()
+                if chunk is None:
+                    break
+                if self.aborted:
+                    continue
+                delay = deliver_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    writer.write(chunk)
+                    await writer.drain()
+                except (ConnectionError, OSError):
+                    self.abort()
+            if not self.aborted and writer.can_write_eof():
+                writer.write_eof()
+
+        delivery = loop.create_task(deliver())
+        free_at = last_at = loop.time()
+        try:
+            while True:
+                data = await reader.read(proxy.chunk_size or READ_SIZE)
+                if not data or self.aborted:
+                    break
+                size = proxy.chunk_size or len(data)
+                for start in range(0, len(data), size):
+                    chunk = data[start:start + size]
+                    now = loop.time()
+                    if proxy.bandwidth:
+                        free_at = max(free_at, now) + (
+                            len(chunk) / float(proxy.bandwidth))
+                    else:
+                        free_at = now
+                    # TCP keeps chunks in order, whatever the jitter.
+                    last_at = max(last_at, free_at + proxy._delay())
+                    await queue.put((last_at, chunk))
+                    proxy._count(direction, len(chunk))
+                    self.carried += len(chunk)
+                    if (proxy.reset_after is not None
+                            and self.carried >= proxy.reset_after):
+                        proxy.resets += 1
+                        self.abort()
+                        return
+            await queue.put((last_at, None))
+            await delivery
+        except (ConnectionError, OSError):
+            self.abort()
+        finally:
+            delivery.cancel()
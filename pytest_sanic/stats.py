@@ -0,0 +1,195 @@
+import warnings
+import weakref
+
+import httpx
+
+
+# httpx >= 0.20 tells the connection a response came over (network_stream
+# extension) and lets event hooks wrap every response stream, connection
+# and received bytes counts need both.
+NETWORK_STATS = tuple(
+    int(part) for part in httpx.__version__.split('.')[:2]) >= (0, 20)
+
+
+class ConnectionSet(set):
+
+    """
+    the set of live server connections, which also counts every
+    connection the server accepted.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.opened = len(self)
+        self.peak = len(self)
+
+    def add(self, connection):
+        if connection not in self:
+            self.opened += 1
+        super().add(connection)
+        self.peak = max(self.peak, len(self))
+
+    def reset_counters(self):
+        self.opened = len(self)
+        self.peak = len(self)
+
+
+class _CountingStream(httpx.AsyncByteStream):
+
+    """
+    a response stream counting the body bytes received.
+    """
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self._stats = stats
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._stats._bytes_received += len(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class _CountingRequestStream(httpx.AsyncByteStream):
+
+    """
+    a streamed request body counting the bytes sent.
+    """
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self._stats = stats
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._stats.bytes_sent += len(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class ClientStats:
+
+    """
+    connection reuse, traffic and timing figures of a TestClient, taken
+    from httpx event hooks. Byte counts cover request and response bodies,
+    response times run from sending the request to closing the response.
+
+    Connections and received bytes are None (with a warning) on httpx
+    < 0.20, which does not let them be counted.
+    """
+
+    def __init__(self, server=None):
+        self.server = server
+        self._streams = weakref.WeakSet()
+        self.reset()
+
+    def reset(self):
+        """
+        Start counting afresh, e.g. after a warmup.
+        """
+        self.requests = 0
+        self._connections = 0
+        # requests sent over a network connection (not in-process).
+        self._connected = 0
+        self.bytes_sent = 0
+        self._bytes_received = 0
+        self.response_times = []
+        connections = getattr(self.server, "connections", None)
+        if isinstance(connections, ConnectionSet):
+            connections.reset_counters()
+
+    @property
+    def event_hooks(self):
+        return {"request": [self.on_request], "response": [self.on_response]}
+
+    async def on_request(self, request):
+        length = request.headers.get("content-length")
+        if length is not None:
+            self.bytes_sent += int(length)
+        elif request.headers.get("transfer-encoding") == "chunked":
+            # streamed bodies are counted as they are sent.
+            request.stream = _CountingRequestStream(request.stream, self)
+
+    async def on_response(self, response):
+        self.requests += 1
+        stream = response.extensions.get("network_stream")
+        # in-process transports have no connection at all.
+        if stream is not None:
+            self._connected += 1
+            if stream not in self._streams:
+                self._streams.add(stream)
+                self._connections += 1
+        response.stream = _CountingStream(response.stream, self)
+
+    def _network_stat(self, name, value):
+        if NETWORK_STATS:
+            return value
+        warnings.warn(
+            "ClientStats.{name} is not counted before httpx 0.20.".format(
+                name=name))
+        return None
+
+    @property
+    def connections(self):
+        return self._network_stat('connections', self._connections)
+
+    @property
+    def bytes_received(self):
+        return self._network_stat('bytes_received', self._bytes_received)
+
+    @property
+    def reused(self):
+        """
+        Requests sent over an already open keep-alive connection.
+        """
+        return self._network_stat(
+            'reused', max(self._connected - self._connections, 0))
+
+    @property
+    def reuse_ratio(self):
+        if not NETWORK_STATS or not self._connected:
+            return self._network_stat('reuse_ratio', None)
+        return self.reused / self._connected
+
+    @property
+    def server_connections(self):
+        """
+        Connections accepted by the server, None when it does not count
+        them (e.g. in-process ASGI transport).
+        """
+        connections = getattr(self.server, "connections", None)
+        if isinstance(connections, ConnectionSet):
+            return connections.opened
+        return None
+
+    @property
+    def mean_response_time(self):
+        if not self.response_times:
+            return None
+        return sum(self.response_times) / len(self.response_times)
+
+    @property
+    def max_response_time(self):
+        if not self.response_times:
+            return None
+        return max(self.response_times)
+
+    def __repr__(self):
+        if not NETWORK_STATS:
+            return "<ClientStats requests={requests} sent={sent}B>".format(
+                requests=self.requests, sent=self.bytes_sent)
+        return (
+            "<ClientStats requests={requests} connections={connections} "
+            "reused={reused} sent={sent}B received={received}B>"
+        ).format(
+            requests=self.requests,
+            connections=self.connections,
+            reused=self.reused,
+            sent=self.bytes_sent,
+            received=self.bytes_received,
+        )
@@ -1,13 +1,30 @@
+import os
+import time
+import signal
 import socket
 import asyncio
+import tempfile
 import warnings
+import multiprocessing
 import httpx
 import websockets
 
+from collections import deque
+from types import SimpleNamespace
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+
 from sanic.server import serve, HttpProtocol
-from inspect import isawaitable
+from urllib.parse import urlsplit
+from uuid import uuid4
 from sanic.app import Sanic
 
+from . import memory
+from .baseline import record
+from .leaks import track
+from . import listeners as _listeners
+from .stats import ClientStats, ConnectionSet
+
 
 HEAD = 'HEAD'
 GET = 'GET'
@@ -17,17 +34,50 @@ PATCH = 'PATCH'
 POST = 'POST'
 PUT = 'PUT'
 
+# how long TestServer.close waits for in-flight requests and websocket
+# closing handshakes, before closing connections by force. None closes
+# busy connections right away and waits for websockets to close.
+SHUTDOWN_TIMEOUT = None
+DRAIN_POLL_INTERVAL = 0.005
+# how long TestServer waits for its worker processes to be serving.
+WORKER_START_TIMEOUT = 30.0
+# Sanic warns about server listeners on every ASGI request, while
+# ASGITestServer runs them itself.
+ASGI_LISTENER_WARNING = r'You have set a listener for .* in ASGI mode'
+# the end of the uris of TestClient.map.
+_NO_URI = object()
+# websockets.connect arguments ASGIWebSocket supports.
+ASGI_WEBSOCKET_ARGUMENTS = ('extra_headers', 'subprotocols', 'loop')
 
-async def trigger_events(events, loop):
+
+async def trigger_events(events, loop, concurrent=False, event=None,
+                         timings=None):
     """Trigger events (functions or async)
 
     :param events: one or more sync or async functions to execute
     :param loop: event loop
+    :param concurrent: run all of them concurrently, instead of only those
+        marked independent
+    :param event: name of the server event, for timings
+    :param timings: list the ListenerTiming of every function is added to
+    """
+    await _listeners.run_listeners(
+        events, loop, concurrent=concurrent, event=event, timings=timings)
+
+
+def finalize_app(app):
+    """
+    Finalize the routers of a Sanic application, once.
     """
-    for event in events:
-        result = event(loop)
-        if isawaitable(result):
-            await result
+    if not app.router.finalized:
+        app.router.finalize()
+    if app.signal_router.routes and not app.signal_router.finalized:
+        app.signal_router.finalize()
+
+
+def _is_finalized(app):
+    return app.router.finalized and (
+        app.signal_router.finalized or not app.signal_router.routes)
 
 
 class TestServer:
@@ -40,6 +90,8 @@ class TestServer:
                  loop=None, protocol=None,
                  backlog=100, ssl=None,
                  scheme=None, connections=None,
+                 uds=False, shutdown_timeout=SHUTDOWN_TIMEOUT,
+                 sock=None, workers=1, concurrent_listeners=None,
                  **kwargs):
         if not isinstance(app, Sanic):
             raise TypeError("app should be a Sanic application.")
@@ -54,8 +106,14 @@ class TestServer:
         self.backlog = backlog
         self.server = None
         self.port = None
-        self.connections = connections if connections else set()
+        self.connections = connections if connections else ConnectionSet()
         self.ssl = ssl
+        # unix socket path, when serving over a unix domain socket.
+        self.unix = None
+        if uds:
+            self.unix = os.path.join(
+                tempfile.gettempdir(),
+                "pytest-sanic-{id}.sock".format(id=uuid4().hex[:12]))
         if scheme is None:
             if self.ssl:
                 self.scheme = "https"
@@ -69,22 +127,67 @@ class TestServer:
         self.after_server_start = None
         self.before_server_stop = None
         self.after_server_stop = None
+        # run all listeners of an event concurrently, defaults to
+        # --sanic-concurrent-listeners.
+        if concurrent_listeners is None:
+            concurrent_listeners = _listeners.CONCURRENT
+        self.concurrent_listeners = concurrent_listeners
+        # how long each listener took, since the last start.
+        self.listener_timings = []
+
+        # an already bound socket to serve on, instead of binding one.
+        self.sock = sock
+        self.socket = None
+        # serve from that many forked processes sharing the socket.
+        self.workers = workers
+        self.processes = []
 
         # state
         self.closed = None
         self.is_running = False
+        self.shutdown_timeout = shutdown_timeout
+        # seconds spent in each phase of the last close()
+        self.shutdown_timings = {}
+        track(self)
+
+    async def _trigger(self, event, listeners):
+        await trigger_events(
+            listeners, self.loop, concurrent=self.concurrent_listeners,
+            event=event, timings=self.listener_timings)
+
+    def _bind(self):
+        if self.sock is not None:
+            self.socket = self.sock
+            if self.socket.family == socket.AF_UNIX:
+                self.unix = self.socket.getsockname()
+            else:
+                self.host, self.port = self.socket.getsockname()[:2]
+        elif self.unix:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.bind(self.unix)
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.bind((self.host, 0))
+            self.port = self.socket.getsockname()[1]
 
     async def start_server(self):
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((self.host, 0))
-        self.port = self.socket.getsockname()[1]
+        started = time.perf_counter()
+        self.listener_timings = []
+        self._bind()
+        if self.workers > 1:
+            await self._start_workers()
+            record('server_start', time.perf_counter() - started)
+            return
 
-        # server settings
+        # server settings, Sanic prepends its router finalization to the
+        # app listeners on every call, keep them as they are.
+        listeners = list(self.app.listeners["before_server_start"])
         server_settings = self.app._helper(
             host=self.host, port=self.port,
             ssl=self.ssl, sock=self.socket,
             loop=self.loop, protocol=self.protocol,
             backlog=self.backlog, run_async=True)
+        self.app.listeners["before_server_start"] = listeners
 
         # clean up host/port.
         # host/port should not be used.
@@ -93,6 +196,11 @@ class TestServer:
 
         # Let's get listeners
         self.before_server_start = server_settings.get('before_start', [])
+        if _is_finalized(self.app):
+            # e.g. a cached application, started again.
+            self.before_server_start = [
+                listener for listener in self.before_server_start
+                if getattr(listener, 'func', None) is not Sanic.finalize]
         self.after_server_start = server_settings.get('after_start', [])
         self.before_server_stop = server_settings.get('before_stop', [])
         self.after_server_stop = server_settings.get('after_stop', [])
@@ -101,7 +209,7 @@ class TestServer:
         server_settings.pop("main_stop", None)
 
         # Trigger before_start events
-        await trigger_events(self.before_server_start, self.loop)
+        await self._trigger("before_server_start", self.before_server_start)
 
         # Connections
         server_settings["connections"] = self.connections
@@ -112,39 +220,187 @@ class TestServer:
         self.app.is_running = True
 
         # Trigger after_start events
-        await trigger_events(self.after_server_start, self.loop)
+        await self._trigger("after_server_start", self.after_server_start)
+        record('server_start', time.perf_counter() - started)
 
     async def close(self):
         """
         Close server.
+
+        With a ``shutdown_timeout``, in-flight requests and websocket
+        closing handshakes are drained concurrently for up to that many
+        seconds, then remaining connections are closed by force. Without
+        it, busy connections are closed right away and websockets run
+        their closing handshake. How long each phase took is kept in
+        ``shutdown_timings``.
         """
-        if self.is_running and not self.closed:
+        if self.is_running and self.processes:
+            await self._close_workers()
+        elif self.is_running and not self.closed:
+            timings = self.shutdown_timings = {}
+            started = time.perf_counter()
+
+            def lap(name):
+                timings[name] = time.perf_counter() - started - sum(
+                    timings.values())
+
             # Trigger before_stop events
-            await trigger_events(self.before_server_stop, self.loop)
+            await self._trigger("before_server_stop", self.before_server_stop)
+            lap('before_stop')
 
             # Stop Server
             self.server.close()
-            await self.server.wait_closed()
-
-            for connection in self.connections:
-                connection.close_if_idle()
+            deadline = self._deadline()
+            await self._drain(deadline)
+            lap('drain')
 
             # Force close connections
-            coros = []
-            for conn in self.connections:
-                if hasattr(conn, "websocket") and conn.websocket:
-                    coros.append(conn.websocket.close_connection())
-                else:
-                    conn.close()
-            await asyncio.gather(*coros)
+            for conn in list(self.connections):
+                conn.close()
+            lap('force_close')
+
+            try:
+                await asyncio.wait_for(
+                    self.server.wait_closed(), self._remaining(deadline))
+            except asyncio.TimeoutError:
+                pass
+            lap('wait_closed')
 
             # Trigger after_stop events
-            await trigger_events(self.after_server_stop, self.loop)
+            await self._trigger("after_server_stop", self.after_server_stop)
+            lap('after_stop')
+            timings['total'] = time.perf_counter() - started
+            record('server_stop', timings['total'])
 
             self.closed = True
             self.is_running = False
             self.app.is_running = False
             self.port = None
+            if self.unix and os.path.exists(self.unix):
+                os.unlink(self.unix)
+
+    def _deadline(self):
+        if self.shutdown_timeout is None:
+            return None
+        return self.loop.time() + self.shutdown_timeout
+
+    def _remaining(self, deadline):
+        if deadline is None:
+            return None
+        return max(deadline - self.loop.time(), 0)
+
+    async def _drain(self, deadline):
+        """
+        Let websockets run their closing handshake and, with a ``deadline``,
+        HTTP connections finish their requests, concurrently, until then.
+        """
+        ws_conns = []
+        for conn in self.connections:
+            if hasattr(conn, "websocket") and conn.websocket:
+                ws_conns.append(conn)
+
+        async def drain_http():
+            while True:
+                conns = [c for c in self.connections if c not in ws_conns]
+                if not conns:
+                    return
+                for conn in conns:
+                    conn.close_if_idle()
+                await asyncio.sleep(DRAIN_POLL_INTERVAL)
+
+        tasks = []
+        if deadline is not None:
+            tasks.append(self.loop.create_task(drain_http()))
+        for conn in ws_conns:
+            tasks.append(self.loop.create_task(
+                conn.websocket.close_connection()))
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(
+            tasks, timeout=self._remaining(deadline))
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    async def _start_workers(self):
+        """
+        Fork ``workers`` processes serving the application on the socket,
+        and wait until all of them are ready.
+        """
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            raise RuntimeError("workers need the fork start method.")
+
+        self.socket.listen(self.backlog)
+        readers = []
+        for _ in range(self.workers):
+            reader, writer = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_serve_worker, args=(self, writer), daemon=True)
+            process.start()
+            writer.close()
+            self.processes.append(process)
+            readers.append(reader)
+
+        for reader in readers:
+            ready = await self.loop.run_in_executor(
+                None, reader.poll, WORKER_START_TIMEOUT)
+            try:
+                error = reader.recv() if ready else "start timed out"
+            except EOFError:
+                error = "worker exited"
+            reader.close()
+            if error is not None:
+                await self._close_workers()
+                raise RuntimeError(
+                    "TestServer worker failed to start: {error}".format(
+                        error=error))
+
+        self.server = self.processes
+        self.is_running = True
+
+    async def _close_workers(self):
+        """
+        Stop worker processes, gracefully first (SIGTERM, which runs the
+        stop listeners), then by force after ``shutdown_timeout`` if any.
+        """
+        started = time.perf_counter()
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = self._deadline()
+        for process in self.processes:
+            await self.loop.run_in_executor(
+                None, process.join, self._remaining(deadline))
+        graceful = time.perf_counter() - started
+        for process in self.processes:
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self.socket.close()
+        total = time.perf_counter() - started
+        self.shutdown_timings = {
+            'workers': graceful,
+            'force_close': total - graceful,
+            'total': total,
+        }
+        record('server_stop', total)
+        self.processes = []
+        self.closed = True
+        self.is_running = False
+        self.port = None
+        if self.unix and os.path.exists(self.unix):
+            os.unlink(self.unix)
+
+    def reset(self):
+        """
+        Reset per-test state of a running server, idle keep-alive
+        connections are dropped so the next test starts with fresh ones.
+        """
+        for connection in list(self.connections):
+            connection.close_if_idle()
 
     def has_started(self):
         """
@@ -153,6 +409,12 @@ class TestServer:
         return self.server is not None
 
     def make_url(self, uri):
+        if self.unix:
+            return "{scheme}://{host}{uri}".format(
+                scheme=self.scheme,
+                host=self.host,
+                uri=uri
+            )
         return "{scheme}://{host}:{port}{uri}".format(
                 scheme=self.scheme,
                 host=self.host,
@@ -161,6 +423,410 @@ class TestServer:
             )
 
 
+def _serve_worker(parent, ready):
+    """
+    Worker process of a TestServer: serve the application on the socket
+    inherited from ``parent`` until SIGTERM.
+    """
+    code = 0
+    try:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = TestServer(
+            parent.app, sock=parent.socket,
+            protocol=parent.protocol, ssl=parent.ssl,
+            backlog=parent.backlog, scheme=parent.scheme,
+            shutdown_timeout=parent.shutdown_timeout)
+        loop.run_until_complete(server.start_server())
+        stopping = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopping.set)
+        ready.send(None)
+        loop.run_until_complete(stopping.wait())
+        loop.run_until_complete(server.close())
+    except BaseException as e:
+        code = 1
+        try:
+            ready.send(repr(e))
+        except Exception:  # NOQA
+            pass
+    finally:
+        # never run the parent's (pytest) exit handlers.
+        os._exit(code)
+
+
+@contextmanager
+def _ignore_asgi_listener_warning():
+    """
+    Ignore the ASGI listener warning of Sanic in the block, which should
+    not await anything: the filters in place are restored at its end.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            'ignore', message=ASGI_LISTENER_WARNING, category=UserWarning)
+        yield
+
+
+class _ASGICall:
+
+    """
+    awaits an ASGI call of a Sanic application, which warns about listeners
+    before it first suspends: only that first step runs without the
+    warning, the filters are never changed across an await.
+    """
+
+    def __init__(self, coro):
+        self.coro = coro
+
+    def __await__(self):
+        try:
+            with _ignore_asgi_listener_warning():
+                result = self.coro.send(None)
+        except StopIteration as e:
+            return e.value
+        while True:
+            try:
+                value = yield result
+            except GeneratorExit:
+                self.coro.close()
+                raise
+            except BaseException as e:
+                send, value = self.coro.throw, e
+            else:
+                send = self.coro.send
+            try:
+                result = send(value)
+            except StopIteration as e:
+                return e.value
+
+
+class _ASGIApp:
+
+    """
+    the ASGI interface of a Sanic application, without the listener warning.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        await _ASGICall(self.app(scope, receive, send))
+
+
+class ASGITestServer(TestServer):
+
+    """
+    an in-process test server, which drives the Sanic application through
+    its ASGI interface: no socket is bound and ``serve()`` is never called.
+    """
+
+    def __init__(self, app, host='127.0.0.1', scheme=None, **kwargs):
+        super().__init__(app, host=host, scheme=scheme, **kwargs)
+        self._asgi = None
+
+    def _listeners(self, event, reverse=False):
+        listeners = list(self.app.listeners.get(event, []))
+        if reverse:
+            listeners.reverse()
+        return [partial(listener, self.app) for listener in listeners]
+
+    async def start_server(self):
+        started = time.perf_counter()
+        self.listener_timings = []
+        # Sanic resolves `app.loop` and websockets differently under ASGI.
+        self._asgi = self.app.asgi
+        self.app.asgi = True
+
+        self.before_server_start = self._listeners("before_server_start")
+        self.after_server_start = self._listeners("after_server_start")
+        self.before_server_stop = self._listeners("before_server_stop", True)
+        self.after_server_stop = self._listeners("after_server_stop", True)
+
+        finalize_app(self.app)
+
+        await self._trigger("before_server_start", self.before_server_start)
+        self.server = self.app
+        self.is_running = True
+        self.app.is_running = True
+        await self._trigger("after_server_start", self.after_server_start)
+        record('server_start', time.perf_counter() - started)
+
+    async def close(self):
+        """
+        Close server.
+        """
+        if self.is_running and not self.closed:
+            started = time.perf_counter()
+            await self._trigger("before_server_stop", self.before_server_stop)
+            before_stop = time.perf_counter() - started
+            await self._trigger("after_server_stop", self.after_server_stop)
+            total = time.perf_counter() - started
+            self.shutdown_timings = {
+                'before_stop': before_stop,
+                'after_stop': total - before_stop,
+                'total': total,
+            }
+            record('server_stop', total)
+            self.closed = True
+            self.is_running = False
+            self.app.is_running = False
+            self.app.asgi = self._asgi
+
+    def make_url(self, uri):
+        return "{scheme}://{host}{uri}".format(
+                scheme=self.scheme,
+                host=self.host,
+                uri=uri
+            )
+
+
+class ASGIWebSocket:
+
+    """
+    a websocket client connected to a Sanic application through ASGI,
+    exposing the ``send``/``recv``/``close`` subset of a websockets client.
+    """
+
+    def __init__(self, app, url, extra_headers=None, subprotocols=None,
+                 loop=None):
+        parts = urlsplit(url)
+        self.app = _ASGIApp(app)
+        self.loop = loop or asyncio.get_event_loop()
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": parts.scheme or "ws",
+            "path": parts.path or "/",
+            "raw_path": (parts.path or "/").encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": [
+                (key.lower().encode("latin-1"), value.encode("latin-1"))
+                for key, value in dict(extra_headers or {}).items()
+            ],
+            "subprotocols": list(subprotocols or []),
+        }
+        self.closed = False
+        self._incoming = asyncio.Queue()
+        self._outgoing = asyncio.Queue()
+        self._task = None
+
+    async def connect(self):
+        await self._incoming.put({"type": "websocket.connect"})
+        self._task = self.loop.create_task(
+            self.app(self.scope, self._incoming.get, self._outgoing.put))
+        message = await self._next_message()
+        if message["type"] != "websocket.accept":
+            self.closed = True
+            raise ConnectionError("websocket connection was rejected.")
+        return self
+
+    async def _next_message(self):
+        get = self.loop.create_task(self._outgoing.get())
+        await asyncio.wait(
+            {get, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if get.done():
+            return get.result()
+        get.cancel()
+        self.closed = True
+        # propagate errors of the application, if any.
+        self._task.result()
+        raise ConnectionError("websocket connection is closed.")
+
+    async def send(self, data):
+        message = {"type": "websocket.receive"}
+        if isinstance(data, bytes):
+            message["bytes"] = data
+        else:
+            message["text"] = data
+        await self._incoming.put(message)
+
+    async def recv(self):
+        message = await self._next_message()
+        if message["type"] == "websocket.close":
+            self.closed = True
+            raise ConnectionError("websocket connection is closed.")
+        if message.get("bytes") is not None:
+            return message["bytes"]
+        return message.get("text")
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            await self._incoming.put(
+                {"type": "websocket.disconnect", "code": 1000})
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:  # NOQA
+                pass
+        self.closed = True
+
+
+class ServerPool:
+
+    """
+    a pool of started TestServers, so that one server per application can
+    be shared by many tests, and its listeners only fire once.
+    """
+
+    def __init__(self):
+        self._servers = {}
+
+    def __len__(self):
+        return len(self._servers)
+
+    async def acquire(self, app, key=None, **kwargs):
+        """
+        Get a running TestServer for ``app``, starting it on first use.
+
+        ``app`` is either a Sanic application or a factory returning one,
+        which is only called when no server is running for ``key`` yet.
+        ``key`` defaults to the application (or factory) identity.
+        """
+        if key is None:
+            key = app
+        server = self._servers.get(key)
+        if server is not None and server.is_running:
+            server.reset()
+            return server
+
+        if not isinstance(app, Sanic) and callable(app):
+            app = app()
+        server = TestServer(app, **kwargs)
+        await server.start_server()
+        self._servers[key] = server
+        return server
+
+    async def close(self):
+        """
+        Close all pooled servers.
+        """
+        servers = list(self._servers.values())
+        self._servers.clear()
+        await asyncio.gather(*[server.close() for server in servers])
+
+
+class AppCache:
+
+    """
+    Sanic applications built once, their routers finalized, and handed out
+    again with the config, ctx, listeners and middleware they had once
+    built, so that tests do not see each other's changes.
+
+    Routes can not be added to a cached application, ctx is restored as a
+    shallow copy.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def get(self, factory, key=None, config=None, ctx=None):
+        """
+        Get the application built by ``factory``, building it on first use.
+        ``key`` defaults to the factory identity, ``config`` and ``ctx``
+        are overrides set on the application until it is restored.
+        """
+        if key is None:
+            key = factory
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            app = factory()
+            finalize_app(app)
+            snapshot = self._snapshots[key] = _AppSnapshot(app)
+        else:
+            snapshot.restore()
+        _override(snapshot.app, config=config, ctx=ctx)
+        return snapshot.app
+
+    def restore(self, key):
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            snapshot.restore()
+
+
+class _AppSnapshot:
+
+    """
+    the per test state of a built application.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.config = dict(app.config)
+        self.ctx = dict(vars(app.ctx))
+        self.listeners = {
+            event: list(listeners)
+            for event, listeners in app.listeners.items()}
+        self.request_middleware = list(app.request_middleware)
+        self.response_middleware = list(app.response_middleware)
+
+    def restore(self):
+        app = self.app
+        for name in list(app.config):
+            if name not in self.config:
+                del app.config[name]
+        for name, value in self.config.items():
+            if app.config.get(name) is not value:
+                setattr(app.config, name, value)
+        app.ctx = SimpleNamespace(**self.ctx)
+        app.listeners.clear()
+        for event, listeners in self.listeners.items():
+            app.listeners[event] = list(listeners)
+        app.request_middleware.clear()
+        app.request_middleware.extend(self.request_middleware)
+        app.response_middleware.clear()
+        app.response_middleware.extend(self.response_middleware)
+
+
+def _override(app, config=None, ctx=None):
+    """
+    Set config and ctx overrides on an application.
+    """
+    for name, value in (config or {}).items():
+        setattr(app.config, name, value)
+    for name, value in (ctx or {}).items():
+        setattr(app.ctx, name, value)
+
+
+class RequestResult:
+
+    """
+    outcome of a request sent by TestClient.gather/map, ``elapsed`` is the
+    request wall time in seconds.
+    """
+
+    def __init__(self, method, uri, response=None, elapsed=None, error=None):
+        self.method = method
+        self.uri = uri
+        self.response = response
+        self.elapsed = elapsed
+        self.error = error
+
+    def __repr__(self):
+        return "<RequestResult {method} {uri} {outcome} {elapsed}>".format(
+            method=self.method,
+            uri=self.uri,
+            outcome=self.error or getattr(self.response, "status_code", None),
+            elapsed=self.elapsed,
+        )
+
+
+def _request_spec(spec):
+    """
+    Normalize a request spec: ``(method, uri)``, ``(method, uri, kwargs)``
+    or ``{"method": ..., "uri": ..., **kwargs}``.
+    """
+    if isinstance(spec, dict):
+        kwargs = dict(spec)
+        return kwargs.pop("method", GET), kwargs.pop("uri"), kwargs
+    if len(spec) == 2:
+        return spec[0], spec[1], {}
+    method, uri, kwargs = spec
+    return method, uri, dict(kwargs)
+
+
 class TestClient:
 
     """
@@ -172,9 +838,16 @@ class TestClient:
                  protocol=None,
                  ssl=None,
                  scheme=None,
+                 server=None,
+                 transport=None,
+                 uds=False,
+                 pool_size=None,
+                 workers=1,
                  **kwargs):
         if not isinstance(app, Sanic):
             raise TypeError("app should be a Sanic application.")
+        if server is not None and server.app is not app:
+            raise ValueError("server should be serving the given app.")
 
         if loop:
             warnings.warn("passing through `loop` is deprecated.",
@@ -187,15 +860,58 @@ class TestClient:
         self._scheme = scheme
         self._protocol = HttpProtocol if protocol is None else protocol
         self._closed = False
-        self._server = TestServer(
+        # a server given by the caller (e.g. from a ServerPool) is
+        # shared, it is neither started nor closed by this client.
+        self._owns_server = server is None
+        # transport="asgi" talks to the application in-process, any other
+        # transport is handed over to httpx.
+        self._asgi = transport == "asgi"
+        if server is None:
+            if self._asgi:
+                server = ASGITestServer(self._app, scheme=self._scheme)
+            else:
+                server = TestServer(
                     self._app, loop=loop,
                     protocol=self._protocol, ssl=self._ssl,
-                    scheme=self._scheme)
+                    scheme=self._scheme, uds=uds, workers=workers)
+        self._server = server
+        if self._asgi:
+            kwargs["transport"] = httpx.ASGITransport(
+                app=_ASGIApp(self._app))
+        elif self._server.unix:
+            kwargs["transport"] = httpx.AsyncHTTPTransport(
+                uds=self._server.unix)
+        elif transport is not None:
+            kwargs["transport"] = transport
+        # size the connection pool (and keep-alive) to the concurrency the
+        # test is going to use.
+        self._pool_size = None
+        if pool_size is not None and "limits" not in kwargs:
+            self._pool_size = pool_size
+            kwargs["limits"] = httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size)
+        # connection reuse and traffic figures, see ClientStats.
+        self._stats = ClientStats(None if self._asgi else self._server)
+        event_hooks = {
+            name: list(hooks)
+            for name, hooks in kwargs.get("event_hooks", {}).items()
+        }
+        for name, hooks in self._stats.event_hooks.items():
+            event_hooks.setdefault(name, []).extend(hooks)
+        kwargs["event_hooks"] = event_hooks
         self._session = httpx.AsyncClient(**kwargs)
-        # Let's collect responses objects and websocket objects,
-        # and clean up when test is done.
-        self._responses = []
+        # Let's collect streamed responses that are still open and
+        # websocket objects, and clean up when test is done. Responses
+        # returned by get/post/... are fully read, nothing to clean up.
+        self._responses = set()
         self._websockets = []
+        # a NetworkProxy requests go through instead of straight to the
+        # server, see the sanic_proxy fixture.
+        self.proxy = None
+        # MemoryTracker measuring requests, see track_memory.
+        self._memory = None
+        track(self)
 
     @property
     def app(self):
@@ -217,36 +933,172 @@ class TestClient:
     def session(self):
         return self._session
 
+    @property
+    def stats(self):
+        return self._stats
+
     def make_url(self, uri):
+        if self.proxy is not None:
+            return self.proxy.make_url(uri)
         return self._server.make_url(uri)
 
     async def start_server(self):
         """
         Start a TestServer that running Sanic application.
         """
-        await self._server.start_server()
+        if self._owns_server and not self._server.is_running:
+            await self._server.start_server()
 
     async def close(self):
         """
         Close TestClient obj, and cleanup all fixtures created by test client.
         """
         if not self._closed:
-            for resp in self._responses:
+            for resp in list(self._responses):
                 await resp.aclose()
-            for ws in self._websockets:
-                await ws.close()
+            self._responses.clear()
+            await asyncio.gather(
+                *[ws.close() for ws in self._websockets])
             await self._session.aclose()
-            await self._server.close()
+            if self._owns_server:
+                await self._server.close()
             self._closed = True
 
     async def _request(self, method, uri, *args, **kwargs):
-        url = self._server.make_url(uri)
-        response = await self._session.request(
-                method, url, *args, **kwargs
-            )
-        self._responses.append(response)
+        url = self.make_url(uri)
+        tracker = self._memory or memory.TRACKER
+        if tracker is None:
+            response = await self._session.request(
+                method, url, *args, **kwargs)
+        else:
+            with tracker.measure(method, uri):
+                response = await self._session.request(
+                    method, url, *args, **kwargs)
+        self._record(response)
         return response
 
+    @contextmanager
+    def track_memory(self, top=10, frames=1):
+        """
+        Measure the allocations of the requests sent in the block with
+        tracemalloc, e.g.
+
+            with test_cli.track_memory() as mem:
+                await test_cli.get('/users')
+            assert mem.max_allocated < 200 * 1024
+        """
+        tracker = memory.MemoryTracker(top=top, frames=frames)
+        self._memory = tracker
+        try:
+            with tracker:
+                yield tracker
+        finally:
+            self._memory = None
+
+    @asynccontextmanager
+    async def stream(self, method, uri, *args, **kwargs):
+        """
+        Send a request and stream the response body, which is not loaded
+        in memory unless read, e.g.
+
+            async with client.stream('GET', '/export') as resp:
+                async for chunk in resp.aiter_bytes():
+                    ...
+        """
+        url = self.make_url(uri)
+        async with self._session.stream(
+                method, url, *args, **kwargs) as response:
+            self._responses.add(response)
+            try:
+                yield response
+            finally:
+                self._responses.discard(response)
+        self._record(response)
+
+    def _record(self, response):
+        elapsed = response.elapsed.total_seconds()
+        self._stats.response_times.append(elapsed)
+        record('request_latency', elapsed)
+
+    async def _timed_request(self, method, uri, kwargs, return_exceptions):
+        start = time.perf_counter()
+        try:
+            response = await self._request(method, uri, **kwargs)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return RequestResult(
+                method, uri, error=e, elapsed=time.perf_counter() - start)
+        return RequestResult(
+            method, uri, response=response,
+            elapsed=time.perf_counter() - start)
+
+    def _concurrency(self, concurrency):
+        if concurrency < 1:
+            raise ValueError("concurrency should be a positive number.")
+        # requests past the pool size would only wait for a connection in
+        # httpx, or time out there on httpx 0.18 (httpcore 0.13).
+        if self._pool_size is not None:
+            return min(concurrency, self._pool_size)
+        return concurrency
+
+    async def gather(self, specs, concurrency=10, return_exceptions=False):
+        """
+        Send many requests concurrently over the client session, at most
+        ``concurrency`` (and ``pool_size``) in flight, and return their
+        RequestResult in order.
+
+        :param specs: ``(method, uri)``, ``(method, uri, kwargs)`` or
+            ``{"method": ..., "uri": ..., **kwargs}`` items
+        :param return_exceptions: record failures in ``RequestResult.error``
+            instead of raising them
+        """
+        concurrency = self._concurrency(concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(spec):
+            method, uri, kwargs = _request_spec(spec)
+            async with semaphore:
+                return await self._timed_request(
+                    method, uri, kwargs, return_exceptions)
+
+        tasks = [asyncio.ensure_future(send(spec)) for spec in specs]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            # a failed request leaves the others running, they are not
+            # left behind.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def map(self, method, uris, concurrency=10,
+                  return_exceptions=False, **kwargs):
+        """
+        Send ``method`` requests to every uri of ``uris`` (any iterable),
+        at most ``concurrency`` (and ``pool_size``) in flight, and yield
+        RequestResult in order.
+        """
+        concurrency = self._concurrency(concurrency)
+        loop = asyncio.get_event_loop()
+        pending = deque()
+        uris = iter(uris)
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    uri = next(uris, _NO_URI)
+                    if uri is _NO_URI:
+                        break
+                    pending.append(loop.create_task(self._timed_request(
+                        method, uri, kwargs, return_exceptions)))
+                if not pending:
+                    break
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
     async def get(self, uri, *args, **kwargs):
         return await self._request(GET, uri, *args, **kwargs)
 
@@ -272,8 +1124,21 @@ class TestClient:
         """
         Create a websocket connection.
         """
-        url = self._server.make_url(uri)
-        ws_conn = await websockets.connect(url, *args, **kwargs)
+        url = self.make_url(uri)
+        if self._asgi:
+            unsupported = sorted(set(kwargs) - set(ASGI_WEBSOCKET_ARGUMENTS))
+            if args:
+                unsupported.insert(0, 'positional arguments')
+            if unsupported:
+                raise TypeError(
+                    "the asgi transport does not support websocket "
+                    "arguments: {names}".format(names=', '.join(unsupported)))
+            ws_conn = await ASGIWebSocket(self._app, url, **kwargs).connect()
+        elif self._server.unix:
+            ws_conn = await websockets.unix_connect(
+                self._server.unix, url, *args, **kwargs)
+        else:
+            ws_conn = await websockets.connect(url, *args, **kwargs)
         # Save it, clean up later.
         self._websockets.append(ws_conn)
         return ws_conn
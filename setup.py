@@ -8,7 +8,7 @@ README_PATH = os.path.join(base, "README.rst")
 
 install_requires = [
     'pytest>=5.2',
-    'httpx>=0.15.4',
+    'httpx>=0.18.1',
     'async_generator>=1.10',
     'websockets>=9.1,<11.0',
 ]
@@ -55,10 +55,33 @@ def app():
         data = await ws.recv()
         await ws.send(data)
 
+    @app.websocket("/test_echo")
+    async def test_echo(request, ws):
+        while True:
+            data = await ws.recv()
+            await ws.send(data)
+
     @app.route("/test_passing_headers", methods=['GET'])
     async def test_get(request):
         return response.json({"headers": dict(request.headers)})
 
+    @app.route("/test_stream", methods=['GET'])
+    async def test_stream(request):
+        async def streaming(resp):
+            for _ in range(int(request.args.get("chunks", 3))):
+                await resp.write(b"x" * 1024)
+        return response.stream(streaming)
+
+    @app.route("/test_upload", methods=['POST'], stream=True)
+    async def test_upload(request):
+        size = 0
+        while True:
+            chunk = await request.stream.read()
+            if chunk is None:
+                break
+            size += len(chunk)
+        return response.json({"size": size})
+
     @app.listener("before_server_start")
     async def mock_init_db(app, loop):
         await asyncio.sleep(0.01)
@@ -0,0 +1,75 @@
+from sanic import Sanic
+from sanic import response
+
+
+builds = []
+
+
+def create_app():
+    builds.append(1)
+    app = Sanic("test_cached_app")
+    app.config.GREETING = "hello"
+    app.ctx.starts = 0
+
+    for index in range(20):
+        @app.route("/item/{index}".format(index=index),
+                   name="item_{index}".format(index=index))
+        async def item(request):
+            return response.text(request.app.config.GREETING)
+
+    @app.route("/ctx")
+    async def ctx(request):
+        return response.json({"starts": request.app.ctx.starts})
+
+    @app.listener("before_server_start")
+    async def count_starts(app, loop):
+        app.ctx.starts += 1
+
+    return app
+
+
+async def test_app_factory_builds_once(sanic_app_factory, sanic_client):
+    app = sanic_app_factory(create_app)
+    assert app.router.finalized
+    client = await sanic_client(app)
+    resp = await client.get('/item/3')
+    assert resp.status_code == 200
+    assert resp.text == "hello"
+
+    app.config.GREETING = "changed"
+    app.ctx.extra = True
+    app.listener("after_server_start")(lambda app, loop: None)
+
+
+async def test_app_factory_restores_state(sanic_app_factory, sanic_client):
+    app = sanic_app_factory(create_app)
+    assert len(builds) == 1
+    assert app.config.GREETING == "hello"
+    assert not hasattr(app.ctx, "extra")
+    assert app.listeners["after_server_start"] == []
+    assert len(app.listeners["before_server_start"]) == 1
+
+    # started again, the finalized app has its listeners run once.
+    client = await sanic_client(app)
+    resp = await client.get('/ctx')
+    assert resp.json() == {"starts": 1}
+    assert len(app.listeners["before_server_start"]) == 1
+
+
+async def test_app_factory_overrides(sanic_app_factory, sanic_client):
+    app = sanic_app_factory(
+        create_app, config={"GREETING": "hi"}, ctx={"user": "guest"})
+    assert app.ctx.user == "guest"
+    client = await sanic_client(app)
+    resp = await client.get('/item/0')
+    assert resp.text == "hi"
+
+
+def test_app_factory_uncached(sanic_app_factory):
+    count = len(builds)
+    app = sanic_app_factory(create_app, cached=False, config={"GREETING": 1})
+    again = sanic_app_factory(create_app, cached=False)
+    assert app is not again
+    assert len(builds) == count + 2
+    assert app.config.GREETING == 1
+    assert not app.router.finalized
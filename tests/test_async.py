@@ -4,4 +4,18 @@ import asyncio
 
 async def test_simple_async_func():
     await asyncio.sleep(0.1)
-    assert True
\ No newline at end of file
+    assert True
+
+
+@pytest.mark.parametrize("n", [1, 2, 3])
+async def test_parametrized_async_func(n, request):
+    assert request.node._sanic_coroutine is True
+    assert request.node._sanic_argnames == ("n", "request")
+    assert request.node.fixturenames.count("loop") == 1
+    await asyncio.sleep(0)
+    assert n in (1, 2, 3)
+
+
+def test_sync_func_classified(request):
+    assert request.node._sanic_coroutine is False
+    assert request.node.fixturenames.count("loop") == 1
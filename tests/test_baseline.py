@@ -0,0 +1,93 @@
+import pytest
+
+from pytest_sanic import baseline
+from pytest_sanic.baseline import BaselineRecorder, mad
+
+
+class FakeCache:
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+class FakeReport:
+
+    nodeid = 'test_api.py::test_get'
+    when = 'teardown'
+    passed = True
+    outcome = 'passed'
+    longrepr = None
+
+
+def run(cache, latencies, **kwargs):
+    recorder = BaselineRecorder(cache, **kwargs)
+    recorder.start()
+    try:
+        recorder.nodeid = FakeReport.nodeid
+        for latency in latencies:
+            baseline.record('request_latency', latency)
+        report = FakeReport()
+        recorder.check(report)
+        recorder.save()
+    finally:
+        recorder.stop()
+    return recorder, report
+
+
+def test_mad():
+    assert mad([1, 2, 3, 4, 100]) == 1
+
+
+def test_baseline_rounds():
+    cache = FakeCache()
+    for _ in range(12):
+        run(cache, [0.010, 0.011, 0.012], save='main')
+    rounds = cache.data['sanic/baselines/main'][FakeReport.nodeid]
+    assert rounds['request_latency'] == [0.011] * 10
+
+
+def test_baseline_compare():
+    cache = FakeCache()
+    for value in (0.010, 0.011, 0.012, 0.010, 0.011):
+        run(cache, [value], save='main')
+
+    recorder, report = run(cache, [0.0115], compare='main', fail=True)
+    assert recorder.regressions == []
+    assert report.outcome == 'passed'
+
+    recorder, report = run(cache, [0.02, 0.03, 0.001], compare='main')
+    assert [r.metric for r in recorder.regressions] == ['request_latency']
+    assert report.outcome == 'passed'
+
+    recorder, report = run(cache, [0.03], compare='main', fail=True)
+    assert report.outcome == 'failed'
+    assert 'request_latency regressed' in report.longrepr
+
+
+def test_baseline_without_cache():
+    with pytest.raises(ValueError):
+        BaselineRecorder(None, save='main')
+
+
+def test_record_without_recorder():
+    baseline.record('wall', 1.0)
+
+
+async def test_record_request_latency(test_cli):
+    recorder = BaselineRecorder(FakeCache(), save='main')
+    recorder.start()
+    try:
+        recorder.nodeid = FakeReport.nodeid
+        await test_cli.get('/test_get')
+        async with test_cli.stream('GET', '/test_get') as resp:
+            await resp.aread()
+    finally:
+        recorder.stop()
+    samples = recorder._samples[FakeReport.nodeid]['request_latency']
+    assert len(samples) == 2
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from pytest_sanic.plugin import _check_leaked_tasks
+
+
+pytestmark = pytest.mark.sanic_batch
+
+loops = []
+
+
+async def test_batch_first(loop):
+    loops.append(loop)
+    await asyncio.sleep(0)
+
+
+async def test_batch_second(loop):
+    loops.append(loop)
+    assert loops[0] is loop
+    assert not loop.is_closed()
+
+
+async def test_batch_fixture(loop, sanic_client, app):
+    client = await sanic_client(app)
+    resp = await client.get('/test_get')
+    assert resp.status_code == 200
+    assert loops[0] is loop
+
+
+def test_check_leaked_tasks():
+    loop = asyncio.new_event_loop()
+    try:
+        _check_leaked_tasks(loop, 'test_batch.py::test_clean')
+        task = loop.create_task(asyncio.sleep(10))
+        with pytest.raises(Exception, match='leaked 1 pending task'):
+            _check_leaked_tasks(loop, 'test_batch.py::test_leak')
+        assert task.cancelled()
+    finally:
+        loop.close()
@@ -0,0 +1,106 @@
+import pytest
+
+from pytest_sanic import baseline
+from pytest_sanic.bench import BenchStats, percentile
+
+
+class FakeCache:
+
+    def get(self, key, default):
+        return default
+
+    def set(self, key, value):
+        pass
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile(samples, 100) == 100
+    assert percentile([], 50) is None
+
+
+def test_bench_stats():
+    stats = BenchStats([0.3, 0.1, 0.2, 0.4], elapsed=2.0, statuses=[200] * 4)
+    assert stats.requests == 4
+    assert stats.throughput == 2.0
+    assert stats.min == 0.1
+    assert stats.max == 0.4
+    assert stats.p50 == 0.2
+    assert stats.statuses[200] == 4
+
+
+async def test_sanic_bench_client(test_cli, sanic_bench):
+    stats = await sanic_bench(test_cli, '/test_get', requests=50,
+                              concurrency=5)
+    assert stats.requests == 50
+    assert stats.errors == 0
+    assert stats.statuses == {200: 50}
+    assert stats.p50 <= stats.p95 <= stats.p99 <= stats.max
+    assert stats.throughput > 0
+    assert not test_cli._responses
+
+
+async def test_sanic_bench_app(app, sanic_bench):
+    stats = await sanic_bench(app, '/test_post', method='POST', requests=20,
+                              concurrency=20, warmup=2)
+    assert stats.requests == 20
+    assert stats.statuses == {200: 20}
+
+
+async def test_sanic_bench_recorded(test_cli, sanic_bench, monkeypatch):
+    recorder = baseline.BaselineRecorder(FakeCache(), save='main')
+    monkeypatch.setattr(baseline, 'RECORDER', recorder)
+    recorder.nodeid = 'test_bench.py::test_get'
+    with test_cli.track_memory() as mem:
+        await sanic_bench(test_cli, '/test_get', requests=10, warmup=2)
+    samples = recorder._samples[recorder.nodeid]['request_latency']
+    assert len(samples) == 10
+    assert len(test_cli.stats.response_times) == 10
+    assert len(mem.requests) == 10
+
+
+async def test_sanic_bench_invalid_concurrency(test_cli, sanic_bench):
+    with pytest.raises(ValueError):
+        await sanic_bench(test_cli, '/test_get', concurrency=0)
+
+
+async def test_sanic_ws_bench_client(test_cli_ws, sanic_ws_bench):
+    stats = await sanic_ws_bench(test_cli_ws, '/test_echo', connections=5,
+                                 messages=20, warmup=1)
+    assert stats.connections == 5
+    assert stats.server_connections == 5
+    assert stats.messages == 100
+    assert stats.errors == 0
+    assert stats.p50 <= stats.p99 <= stats.max
+    assert stats.throughput > 0
+    assert all(ws.closed for ws in test_cli_ws._websockets)
+
+
+async def test_sanic_ws_bench_rate(app, sanic_ws_bench):
+    stats = await sanic_ws_bench(app, '/test_echo', connections=2,
+                                 messages=5, rate=50)
+    assert stats.messages == 10
+    # 5 messages 20ms apart, on each connection
+    assert stats.elapsed >= 0.08
+
+
+async def test_sanic_ws_bench_errors(test_cli_ws, sanic_ws_bench):
+    stats = await sanic_ws_bench(test_cli_ws, '/test_ws', connections=2,
+                                 messages=3)
+    assert stats.messages == 2
+    assert stats.errors == 4
+
+
+async def test_sanic_ws_bench_timeout(app, sanic_ws_bench):
+
+    @app.websocket('/test_silent')
+    async def test_silent(request, ws):
+        while True:
+            await ws.recv()
+
+    stats = await sanic_ws_bench(app, '/test_silent', connections=2,
+                                 messages=3, timeout=0.1)
+    assert stats.messages == 0
+    assert stats.errors == 6
@@ -0,0 +1,67 @@
+import time
+import asyncio
+import logging
+
+from pytest_sanic.blocking import BlockingDetector
+
+
+class FakeReport:
+
+    passed = True
+    outcome = 'passed'
+    longrepr = None
+
+
+async def blocking_handler():
+    await asyncio.sleep(0.01)
+    time.sleep(0.15)
+    await asyncio.sleep(0.01)
+
+
+def test_blocking_detector():
+    detector = BlockingDetector(0.05)
+    loop = detector.loop_factory(asyncio.new_event_loop)()
+    detector.nodeid = 'test_blocking.py::test_handler'
+    detector.start()
+    try:
+        loop.run_until_complete(asyncio.sleep(0.1))
+        assert detector.calls == []
+        loop.run_until_complete(blocking_handler())
+    finally:
+        detector.stop()
+        loop.close()
+
+    assert loop.slow_callback_duration == 0.05
+    assert len(detector.calls) == 1
+    call = detector.calls[0]
+    assert call.nodeid == 'test_blocking.py::test_handler'
+    assert call.duration >= 0.1
+    assert any('time.sleep(0.15)' in line for line in call.stack)
+
+    report = FakeReport()
+    detector.check(report)
+    assert report.outcome == 'failed'
+    assert 'event loop blocked' in report.longrepr
+
+
+def test_blocking_detector_report(tmpdir):
+    path = str(tmpdir.join('blocking.json'))
+    detector = BlockingDetector(0.05, report_path=path)
+    detector.slow_callback('<Handle cb()>', 0.2)
+    report = FakeReport()
+    detector.check(report)
+    assert report.outcome == 'passed'
+    detector.write_report()
+    assert '<Handle cb()>' in tmpdir.join('blocking.json').read()
+
+
+def test_blocking_detector_other_asyncio_logs():
+    detector = BlockingDetector(0.05)
+    detector.start()
+    try:
+        logger = logging.getLogger('asyncio')
+        logger.warning(ValueError('not a string'))
+        logger.warning('Executing %(handle)s', {'handle': 'cb()'})
+    finally:
+        detector.stop()
+    assert detector.calls == []
@@ -1,8 +1,17 @@
 import pytest
+import asyncio
+import httpx
 
 from sanic.app import Sanic
 from sanic import response
 
+from pytest_sanic import stats
+from pytest_sanic.stats import NETWORK_STATS
+
+
+network_stats = pytest.mark.skipif(
+    not NETWORK_STATS, reason="connections are not counted before httpx 0.20")
+
 
 async def test_fixture_sanic_client_get_properties(test_cli):
     assert test_cli.app is not None
@@ -116,3 +125,157 @@ async def test_fixture_sanic_client_raise_exception_for_non_sanic_app(sanic_clie
 
 async def test_fixture_sanic_client_app_is_running(test_cli):
     assert test_cli.app.is_running == True
+
+
+async def test_fixture_sanic_client_does_not_keep_responses(test_cli):
+    for _ in range(10):
+        resp = await test_cli.get('/test_get')
+        assert resp.status_code == 200
+    assert len(test_cli._responses) == 0
+
+
+async def test_fixture_sanic_client_stream(test_cli):
+    async with test_cli.stream('GET', '/test_get') as resp:
+        assert resp.status_code == 200
+        assert resp in test_cli._responses
+        body = b"".join([chunk async for chunk in resp.aiter_bytes()])
+    assert body == b'{"GET":true}'
+    assert len(test_cli._responses) == 0
+
+
+async def test_fixture_sanic_client_stream_response(test_cli):
+    async with test_cli.stream('GET', '/test_stream?chunks=64') as resp:
+        assert resp.status_code == 200
+        size = 0
+        async for chunk in resp.aiter_bytes():
+            size += len(chunk)
+    assert size == 64 * 1024
+    if NETWORK_STATS:
+        assert test_cli.stats.bytes_received == 64 * 1024
+
+
+async def test_fixture_sanic_client_stream_upload(test_cli):
+    async def body():
+        for _ in range(8):
+            yield b"x" * 1024
+
+    resp = await test_cli.post('/test_upload', content=body())
+    assert resp.status_code == 200
+    assert resp.json() == {"size": 8 * 1024}
+    assert test_cli.stats.bytes_sent == 8 * 1024
+
+
+async def test_fixture_sanic_client_stream_closed_with_client(app, sanic_client):
+    client = await sanic_client(app)
+    stream = client.stream('GET', '/test_stream')
+    resp = await stream.__aenter__()
+    assert resp in client._responses
+    await client.close()
+    assert resp.is_closed
+    assert len(client._responses) == 0
+
+
+async def test_fixture_sanic_client_gather(test_cli):
+    results = await test_cli.gather([
+        ('GET', '/test_get'),
+        ('POST', '/test_post', {"json": {"a": 1}}),
+        {"method": "PUT", "uri": "/test_put"},
+    ] * 5, concurrency=4)
+    assert len(results) == 15
+    assert [r.method for r in results[:3]] == ['GET', 'POST', 'PUT']
+    assert [r.response.json() for r in results[:3]] == [
+        {"GET": True}, {"POST": True}, {"PUT": True}]
+    assert all(r.elapsed > 0 for r in results)
+
+
+async def test_fixture_sanic_client_gather_return_exceptions(test_cli):
+    await test_cli.server.close()
+    results = await test_cli.gather(
+        [('GET', '/test_get')], return_exceptions=True)
+    assert results[0].response is None
+    assert results[0].error is not None
+
+
+async def test_fixture_sanic_client_gather_error(app, sanic_client):
+    release = asyncio.Event()
+
+    @app.route('/test_hold')
+    async def hold(request):
+        await release.wait()
+        return response.text('ok')
+
+    client = await sanic_client(app)
+    try:
+        with pytest.raises(httpx.TimeoutException):
+            await client.gather([
+                ('GET', '/test_hold'),
+                ('GET', '/test_hold', {'timeout': 0.05}),
+            ])
+        # the other request is not left running.
+        assert not [
+            task for task in asyncio.all_tasks()
+            if 'gather.<locals>.send' in task.get_coro().__qualname__]
+    finally:
+        release.set()
+
+
+async def test_fixture_sanic_client_map(test_cli):
+    uris = ['/test_get', '/bp_group/bp_route/test_get'] * 10
+    results = [r async for r in test_cli.map('GET', uris, concurrency=3)]
+    assert [r.uri for r in results] == uris
+    assert results[1].response.json() == {"blueprint": "get"}
+
+
+async def test_fixture_sanic_client_map_none(test_cli):
+    uris = ['/test_get', None, '/test_get']
+    results = [r async for r in test_cli.map(
+        'GET', uris, return_exceptions=True)]
+    assert [r.uri for r in results] == uris
+
+
+async def test_fixture_sanic_client_pool_size(app, sanic_client):
+    client = await sanic_client(app, pool_size=2)
+    results = await client.gather([('GET', '/test_get')] * 6, concurrency=6)
+    assert all(r.response.status_code == 200 for r in results)
+    assert len(client.server.connections) <= 2
+
+
+@network_stats
+async def test_fixture_sanic_client_stats_keep_alive(test_cli):
+    for _ in range(5):
+        resp = await test_cli.post('/test_post', json={"a": 1})
+        assert resp.status_code == 200
+    stats = test_cli.stats
+    assert stats.requests == 5
+    assert stats.connections == 1
+    assert stats.reused == 4
+    assert stats.reuse_ratio == 0.8
+    assert stats.server_connections == 1
+    assert stats.bytes_sent == 5 * len(b'{"a": 1}')
+    assert stats.bytes_received == 5 * len(b'{"POST":true}')
+    assert len(stats.response_times) == 5
+    assert stats.mean_response_time <= stats.max_response_time
+
+
+@network_stats
+async def test_fixture_sanic_client_stats_connection_churn(test_cli):
+    for _ in range(3):
+        await test_cli.get('/test_get', headers={"Connection": "close"})
+    assert test_cli.stats.connections == 3
+    assert test_cli.stats.reuse_ratio == 0
+    assert test_cli.stats.server_connections == 3
+
+    test_cli.stats.reset()
+    assert test_cli.stats.requests == 0
+    assert test_cli.stats.server_connections == 0
+
+
+async def test_fixture_sanic_client_stats_old_httpx(test_cli, monkeypatch):
+    monkeypatch.setattr(stats, 'NETWORK_STATS', False)
+    await test_cli.get('/test_get')
+    assert test_cli.stats.requests == 1
+    assert len(test_cli.stats.response_times) == 1
+    with pytest.warns(UserWarning, match='httpx 0.20'):
+        assert test_cli.stats.connections is None
+        assert test_cli.stats.bytes_received is None
+        assert test_cli.stats.reuse_ratio is None
@@ -0,0 +1,108 @@
+import pytest
+import asyncio
+import warnings
+
+from sanic import response
+
+from pytest_sanic.stats import NETWORK_STATS
+
+
+@pytest.fixture
+def test_cli_asgi(loop, app, sanic_client):
+    return loop.run_until_complete(sanic_client(app, transport="asgi"))
+
+
+async def test_fixture_sanic_client_asgi_get(test_cli_asgi):
+    resp = await test_cli_asgi.get('/test_get')
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json == {"GET": True}
+
+
+async def test_fixture_sanic_client_asgi_post(test_cli_asgi):
+    resp = await test_cli_asgi.post('/test_post')
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json == {"POST": True}
+
+
+async def test_fixture_sanic_client_asgi_no_socket(test_cli_asgi):
+    assert test_cli_asgi.port is None
+    assert test_cli_asgi.server.is_running is True
+    assert test_cli_asgi.make_url('/test') == "http://127.0.0.1/test"
+
+
+async def test_fixture_sanic_client_asgi_passing_headers(test_cli_asgi):
+    headers = {"authorization": "Basic bG9naW46cGFzcw=="}
+    resp = await test_cli_asgi.get('/test_passing_headers', headers=headers)
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json["headers"]["authorization"] == headers["authorization"]
+
+
+async def test_fixture_sanic_client_asgi_ws(test_cli_asgi):
+    ws_conn = await test_cli_asgi.ws_connect('/test_ws')
+    data = 'hello world!'
+    await ws_conn.send(data)
+    msg = await ws_conn.recv()
+    assert msg == data
+    await ws_conn.close()
+
+
+async def test_fixture_sanic_client_asgi_close(test_cli_asgi):
+    await test_cli_asgi.close()
+    assert test_cli_asgi.server.is_running is False
+    assert test_cli_asgi.app.asgi is False
+
+
+async def test_fixture_sanic_client_asgi_stream(test_cli_asgi):
+    async def body():
+        for _ in range(4):
+            yield b"x" * 1024
+
+    resp = await test_cli_asgi.post('/test_upload', content=body())
+    assert resp.json() == {"size": 4 * 1024}
+    async with test_cli_asgi.stream('GET', '/test_stream?chunks=4') as resp:
+        body = b"".join([chunk async for chunk in resp.aiter_bytes()])
+    assert len(body) == 4 * 1024
+    if NETWORK_STATS:
+        assert test_cli_asgi.stats.connections == 0
+        assert test_cli_asgi.stats.reuse_ratio is None
+
+
+async def test_fixture_sanic_client_asgi_listener_warning(test_cli_asgi):
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        await test_cli_asgi.gather([('GET', '/test_get')] * 3)
+        # only ignored during ASGI requests.
+        warnings.warn(
+            'You have set a listener for "x" in ASGI mode', UserWarning)
+    messages = [str(warning.message) for warning in caught]
+    assert messages == ['You have set a listener for "x" in ASGI mode']
+
+
+async def test_fixture_sanic_client_asgi_keeps_warning_filters(app,
+                                                               sanic_client):
+    handling = asyncio.Event()
+    release = asyncio.Event()
+
+    @app.route('/test_wait')
+    async def wait(request):
+        handling.set()
+        await release.wait()
+        return response.text('ok')
+
+    client = await sanic_client(app, transport="asgi")
+    with warnings.catch_warnings():
+        request = asyncio.ensure_future(client.get('/test_wait'))
+        await handling.wait()
+        warnings.filterwarnings('ignore', message='added meanwhile')
+        release.set()
+        assert (await request).text == 'ok'
+        assert [f for f in warnings.filters
+                if f[1] is not None and f[1].pattern == 'added meanwhile']
+
+
+async def test_fixture_sanic_client_asgi_ws_unsupported(test_cli_asgi):
+    with pytest.raises(TypeError, match='ping_interval'):
+        await test_cli_asgi.ws_connect('/test_ws', ping_interval=None)
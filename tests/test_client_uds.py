@@ -0,0 +1,39 @@
+import os
+import pytest
+
+from sanic.websocket import WebSocketProtocol
+
+
+@pytest.fixture
+def test_cli_uds(loop, app, sanic_client):
+    return loop.run_until_complete(sanic_client(app, uds=True))
+
+
+async def test_fixture_sanic_client_uds_get(test_cli_uds):
+    assert test_cli_uds.port is None
+    assert os.path.exists(test_cli_uds.server.unix)
+    resp = await test_cli_uds.get('/test_get')
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json == {"GET": True}
+
+
+async def test_fixture_sanic_client_uds_make_url(test_cli_uds):
+    assert test_cli_uds.make_url('/test') == "http://127.0.0.1/test"
+
+
+async def test_fixture_sanic_client_uds_ws(loop, app, sanic_client):
+    client = await sanic_client(
+        app, scheme='ws', protocol=WebSocketProtocol, uds=True)
+    ws_conn = await client.ws_connect('/test_ws')
+    data = 'hello world!'
+    await ws_conn.send(data)
+    msg = await ws_conn.recv()
+    assert msg == data
+    await ws_conn.close()
+
+
+async def test_fixture_sanic_client_uds_close(test_cli_uds):
+    path = test_cli_uds.server.unix
+    await test_cli_uds.close()
+    assert not os.path.exists(path)
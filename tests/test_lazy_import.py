@@ -0,0 +1,12 @@
+import sys
+import subprocess
+
+
+def test_plugin_import_is_lazy():
+    code = (
+        "import sys, pytest_sanic.plugin; "
+        "print(' '.join(m for m in ('httpx', 'websockets', 'sanic', 'uvloop') "
+        "if m in sys.modules))"
+    )
+    out = subprocess.check_output([sys.executable, "-c", code])
+    assert out.decode().strip() == ""
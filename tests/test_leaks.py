@@ -0,0 +1,72 @@
+import socket
+import asyncio
+import warnings
+
+import pytest
+
+from sanic import Sanic
+
+from pytest_sanic.leaks import LeakDetector
+from pytest_sanic import utils
+
+
+class FakeReport:
+
+    when = 'teardown'
+    passed = True
+    outcome = 'passed'
+    longrepr = None
+
+
+def test_leak_detector_tasks():
+    detector = LeakDetector()
+    detector.nodeid = 'test_leaks.py::test_task'
+    loop = asyncio.new_event_loop()
+    try:
+        task = loop.create_task(asyncio.sleep(10))
+        detector.check_tasks(loop)
+    finally:
+        loop.close()
+    assert task.cancelled()
+    assert len(detector.leaks) == 1
+    leak = detector.leaks[0]
+    assert leak.nodeid == 'test_leaks.py::test_task'
+    assert leak.kind == 'task'
+
+
+def test_leak_detector_unclosed_client():
+    detector = LeakDetector(fail=True)
+    detector.start()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        detector.nodeid = 'test_leaks.py::test_client'
+        client = utils.TestClient(Sanic("test_leaked_client"))
+        loop.run_until_complete(client.session.aclose())
+    finally:
+        detector.stop()
+        loop.close()
+    detector.check_resources()
+    assert [leak.kind for leak in detector.leaks] == ['client']
+    assert 'test_leaked_client' in detector.leaks[0].description
+
+    report = FakeReport()
+    detector.check(report)
+    assert report.outcome == 'failed'
+    assert 'leaked client' in report.longrepr
+
+
+def test_leak_detector_unclosed_socket():
+    detector = LeakDetector()
+    detector.nodeid = 'test_leaks.py::test_socket'
+    with pytest.warns(UserWarning, match='kept'):
+        with detector.catch_unclosed():
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            del sock
+            warnings.warn('kept', UserWarning)
+    assert [leak.kind for leak in detector.leaks] == ['resource']
+    assert 'unclosed' in detector.leaks[0].description
+
+    report = FakeReport()
+    detector.check(report)
+    assert report.outcome == 'passed'
@@ -0,0 +1,210 @@
+import time
+import asyncio
+
+import pytest
+
+from sanic import Sanic
+
+from pytest_sanic import listeners
+from pytest_sanic.listeners import ListenerTimer, depends_on, independent
+
+
+DELAY = 0.1
+
+
+def make_app(events):
+    app = Sanic("test_listeners_app")
+
+    def listener(name, marker=None):
+        async def run(app, loop):
+            events.append(("start", name))
+            await asyncio.sleep(DELAY)
+            events.append(("end", name))
+        run.__qualname__ = name
+        if marker is not None:
+            run = marker(run)
+        return run
+
+    app.ctx.listener = listener
+    return app
+
+
+async def test_listeners_run_in_order_by_default(test_server):
+    events = []
+    app = make_app(events)
+    app.listener("before_server_start")(app.ctx.listener("first"))
+    app.listener("before_server_start")(app.ctx.listener("second"))
+
+    await test_server(app, concurrent_listeners=False)
+    assert events == [("start", "first"), ("end", "first"),
+                      ("start", "second"), ("end", "second")]
+
+
+async def test_independent_listeners_run_concurrently(test_server):
+    events = []
+    app = make_app(events)
+    for name in ("pool", "cache", "index"):
+        app.listener("after_server_start")(
+            app.ctx.listener(name, independent))
+
+    started = time.perf_counter()
+    server = await test_server(app)
+    assert time.perf_counter() - started < DELAY * 2
+    assert [event for event, _ in events[:3]] == ["start"] * 3
+
+    timings = [timing for timing in server.listener_timings
+               if timing.event == "after_server_start"]
+    assert sorted(timing.name for timing in timings) == [
+        "cache", "index", "pool"]
+    assert all(timing.elapsed >= DELAY * 0.9 for timing in timings)
+
+
+async def test_listeners_keep_place_of_dependent_ones(test_server):
+    events = []
+    app = make_app(events)
+    app.listener("before_server_start")(app.ctx.listener("a", independent))
+    app.listener("before_server_start")(app.ctx.listener("b", independent))
+    app.listener("before_server_start")(app.ctx.listener("plain"))
+    app.listener("before_server_start")(app.ctx.listener("c", independent))
+
+    await test_server(app, concurrent_listeners=False)
+    plain = events.index(("start", "plain"))
+    assert set(events[:plain]) == {
+        ("start", "a"), ("end", "a"), ("start", "b"), ("end", "b")}
+    assert events[plain:] == [("start", "plain"), ("end", "plain"),
+                              ("start", "c"), ("end", "c")]
+
+
+async def test_depends_on_orders_start_and_stop(test_server):
+    events = []
+    app = make_app(events)
+    database = app.ctx.listener("database", independent)
+    cache = app.ctx.listener("cache", depends_on(database))
+    for event in ("before_server_start", "after_server_stop"):
+        app.listener(event)(database)
+        app.listener(event)(cache)
+
+    server = await test_server(app, concurrent_listeners=True)
+    assert events == [("start", "database"), ("end", "database"),
+                      ("start", "cache"), ("end", "cache")]
+
+    del events[:]
+    await server.close()
+    # stop listeners run reversed, so do dependencies.
+    assert events == [("start", "cache"), ("end", "cache"),
+                      ("start", "database"), ("end", "database")]
+
+
+async def test_depends_on_whatever_the_registration_order(test_server):
+    events = []
+    app = make_app(events)
+    database = app.ctx.listener("database", independent)
+    cache = app.ctx.listener("cache", depends_on(database))
+    for event in ("before_server_start", "after_server_stop"):
+        app.listener(event)(cache)
+        app.listener(event)(database)
+
+    server = await test_server(app, concurrent_listeners=True)
+    assert events == [("start", "database"), ("end", "database"),
+                      ("start", "cache"), ("end", "cache")]
+
+    del events[:]
+    await server.close()
+    assert events == [("start", "cache"), ("end", "cache"),
+                      ("start", "database"), ("end", "database")]
+
+
+async def test_depends_on_across_plain_listener(test_server):
+    events = []
+    app = make_app(events)
+    database = app.ctx.listener("database", independent)
+    cache = app.ctx.listener("cache", depends_on(database))
+    app.listener("before_server_start")(cache)
+    app.listener("before_server_start")(app.ctx.listener("plain"))
+    app.listener("before_server_start")(database)
+
+    await test_server(app, concurrent_listeners=False)
+    assert events == [("start", "plain"), ("end", "plain"),
+                      ("start", "database"), ("end", "database"),
+                      ("start", "cache"), ("end", "cache")]
+
+
+async def test_depends_on_cycle(loop):
+    events = []
+    app = make_app(events)
+    database = app.ctx.listener("database", independent)
+    cache = app.ctx.listener("cache", depends_on(database))
+    depends_on(cache)(database)
+
+    with pytest.raises(ValueError, match="depend on each other"):
+        await listeners.run_listeners(
+            [cache, database], loop, event="before_server_start")
+    assert events == []
+
+
+async def test_concurrent_listeners_option(test_server):
+    events = []
+    app = make_app(events)
+    app.listener("before_server_start")(app.ctx.listener("first"))
+    app.listener("before_server_start")(app.ctx.listener("second"))
+
+    await test_server(app, concurrent_listeners=True)
+    assert events[:2] == [("start", "first"), ("start", "second")]
+
+
+async def test_concurrent_listener_error(test_server):
+    events = []
+    app = make_app(events)
+
+    @app.listener("before_server_start")
+    @independent
+    async def broken(app, loop):
+        raise ValueError("broken")
+
+    app.listener("before_server_start")(app.ctx.listener("other", independent))
+
+    with pytest.raises(ValueError):
+        await test_server(app)
+    # the other listeners are not left running.
+    assert events == [("start", "other"), ("end", "other")]
+
+
+async def test_listener_timer_failing_listener(test_server):
+    app = Sanic("test_listeners_app")
+
+    @app.listener("before_server_start")
+    async def broken(app, loop):
+        raise ValueError("broken")
+
+    timer = ListenerTimer()
+    timer.start()
+    try:
+        with pytest.raises(ValueError):
+            await test_server(app)
+    finally:
+        timer.stop()
+    assert broken.__qualname__ in [
+        timing.name for timing in timer.timings]
+
+
+async def test_listener_timer(test_server):
+    events = []
+    app = make_app(events)
+    app.listener("before_server_start")(app.ctx.listener("warm_pool"))
+
+    timer = ListenerTimer()
+    timer.start()
+    try:
+        server = await test_server(app)
+        await server.close()
+        await test_server(app)
+    finally:
+        timer.stop()
+    assert listeners.TIMER is None
+
+    rows = [row for row in timer.summary() if row[1] == "warm_pool"]
+    assert len(rows) == 1
+    event, name, runs, total, slowest = rows[0]
+    assert event == "before_server_start"
+    assert runs == 2
+    assert total >= slowest >= DELAY * 0.9
@@ -0,0 +1,49 @@
+import pytest
+import asyncio
+
+
+pytestmark = pytest.mark.sanic_loop_scope('module')
+
+LOOPS = []
+
+
+@pytest.fixture(scope='module')
+async def module_async_fixture():
+    await asyncio.sleep(0.01)
+    return asyncio.get_event_loop()
+
+
+@pytest.fixture(scope='module')
+async def module_async_gen_fixture():
+    await asyncio.sleep(0.01)
+    yield {"started": True}
+
+
+async def test_module_loop_first(loop, module_async_fixture):
+    LOOPS.append(loop)
+    assert module_async_fixture is loop
+
+
+async def test_module_loop_second(loop, module_async_fixture,
+                                  module_async_gen_fixture):
+    LOOPS.append(loop)
+    assert module_async_fixture is loop
+    assert module_async_gen_fixture == {"started": True}
+
+
+def test_module_loop_shared():
+    assert len(LOOPS) == 2
+    assert LOOPS[0] is LOOPS[1]
+    assert not LOOPS[0].is_closed()
+
+
+@pytest.mark.sanic_loop_scope('function')
+async def test_function_loop_marker(loop):
+    assert loop not in LOOPS
+
+
+async def test_module_loop_sanic_client(loop, app, sanic_client):
+    client = await sanic_client(app)
+    resp = await client.get('/test_get')
+    assert resp.status_code == 200
+    assert loop is LOOPS[0]
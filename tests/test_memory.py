@@ -0,0 +1,50 @@
+import tracemalloc
+
+from sanic import Sanic, response
+
+
+def leaky_app():
+    app = Sanic("test_memory_app")
+    app.ctx.cache = []
+
+    @app.route("/leak")
+    async def leak(request):
+        app.ctx.cache.append(bytearray(100 * 1024))
+        return response.text("ok")
+
+    @app.route("/small")
+    async def small(request):
+        return response.text("ok")
+
+    return app
+
+
+async def test_client_track_memory(sanic_client):
+    client = await sanic_client(leaky_app())
+    with client.track_memory() as mem:
+        for _ in range(3):
+            await client.get('/leak')
+        await client.get('/small')
+    assert not tracemalloc.is_tracing()
+    assert len(mem.requests) == 4
+    assert [r.uri for r in mem.requests] == ['/leak'] * 3 + ['/small']
+    for request in mem.requests[:3]:
+        assert request.allocated >= 100 * 1024
+        assert request.peak >= request.allocated
+    assert mem.requests[3].allocated < 100 * 1024
+    site, size = mem.top_sites(1)[0]
+    assert 'test_memory.py' in site
+    assert size >= 300 * 1024
+    assert 'per request' in mem.report()
+
+    # requests outside the block are not measured
+    await client.get('/leak')
+    assert len(mem.requests) == 4
+
+
+async def test_sanic_memory(app, sanic_client, sanic_memory):
+    client = await sanic_client(app)
+    await client.get('/test_get')
+    await client.gather([('GET', '/test_get')] * 3)
+    assert len(sanic_memory.requests) == 4
+    assert sanic_memory.allocated_per_request < 200 * 1024
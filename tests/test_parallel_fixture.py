@@ -0,0 +1,101 @@
+import pytest
+import asyncio
+
+
+class Rendezvous:
+
+    """
+    a meeting point the fixtures only all reach when they run concurrently,
+    one after another the first of them times out waiting for the others.
+    """
+
+    def __init__(self, count, timeout=5.0):
+        self.count = count
+        self.timeout = timeout
+        self.arrived = 0
+
+    async def meet(self):
+        self.arrived += 1
+
+        async def everyone():
+            while self.arrived < self.count:
+                await asyncio.sleep(0.001)
+
+        await asyncio.wait_for(everyone(), self.timeout)
+
+
+@pytest.fixture
+def meetings():
+    return {'setup': Rendezvous(2), 'teardown': Rendezvous(2)}
+
+
+@pytest.fixture
+def log():
+    return []
+
+
+@pytest.fixture
+def torn_down(log):
+    yield
+    assert sorted(event for event in log if event.endswith(':teardown')) == [
+        'a:teardown', 'b:teardown']
+
+
+@pytest.fixture
+async def resource_a(meetings, log):
+    log.append('a:setup')
+    await meetings['setup'].meet()
+    yield 'a'
+    await meetings['teardown'].meet()
+    log.append('a:teardown')
+
+
+@pytest.fixture
+async def resource_b(meetings, log):
+    log.append('b:setup')
+    await meetings['setup'].meet()
+    yield 'b'
+    await meetings['teardown'].meet()
+    log.append('b:teardown')
+
+
+@pytest.fixture
+async def value(log):
+    log.append('c:setup')
+    return 'c'
+
+
+@pytest.fixture
+async def dependent_resource(resource_a):
+    return resource_a + '!'
+
+
+@pytest.fixture
+async def failing():
+    await asyncio.sleep(0)
+    raise ValueError("failing fixture")
+
+
+@pytest.fixture
+async def cancelled():
+    raise asyncio.CancelledError()
+    yield
+
+
+@pytest.mark.sanic_parallel_fixtures
+async def test_parallel_fixtures(torn_down, resource_a, resource_b, value,
+                                 log):
+    assert (resource_a, resource_b, value) == ('a', 'b', 'c')
+    assert sorted(log) == ['a:setup', 'b:setup', 'c:setup']
+
+
+@pytest.mark.sanic_parallel_fixtures
+async def test_parallel_fixtures_dependency(resource_b, dependent_resource):
+    assert resource_b == 'b'
+    assert dependent_resource == 'a!'
+
+
+@pytest.mark.xfail(raises=ValueError, strict=True)
+@pytest.mark.sanic_parallel_fixtures
+async def test_parallel_fixtures_cancelled_sibling(failing, cancelled):
+    pass
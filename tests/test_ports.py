@@ -0,0 +1,169 @@
+import socket
+
+import pytest
+
+from pytest_sanic import plugin
+from pytest_sanic.ports import (
+    MIN_RANGE_SIZE, PortAllocator, ephemeral_port_range, worker_allocator,
+    worker_count, worker_index,
+)
+
+
+# plugin globals pytest_configure sets.
+CONFIGURED = (
+    'LOOP_INIT', 'LOOP_SCOPE', 'PARALLEL_FIXTURES', 'BATCH', 'PROFILER',
+    'BLOCKING', 'LEAKS', 'BASELINE', 'LISTENER_TIMER', 'PORT_ALLOCATOR',
+    'PORT_SETTINGS',
+)
+
+
+class FakeConfig:
+
+    defaults = {
+        '--sanic-loop-scope': 'function',
+        '--sanic-profile-top': 10,
+        '--sanic-compare-tolerance': 0.25,
+    }
+
+    def addinivalue_line(self, name, line):
+        pass
+
+    def getoption(self, name):
+        return self.defaults.get(name)
+
+
+def free_port_base(size):
+    """
+    A base port below the ephemeral range, with ``size`` free ports.
+    """
+    first, _ = ephemeral_port_range()
+    for base in range(first - size, 1024, -size):
+        socks = []
+        try:
+            for port in range(base, base + size):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                socks.append(sock)
+                sock.bind(('127.0.0.1', port))
+        except OSError:
+            continue
+        finally:
+            for sock in socks:
+                sock.close()
+        return base
+    pytest.skip("no free port range")
+
+
+def test_worker_index(monkeypatch):
+    monkeypatch.delenv('PYTEST_XDIST_WORKER', raising=False)
+    assert worker_index() is None
+    monkeypatch.setenv('PYTEST_XDIST_WORKER', 'gw12')
+    assert worker_index() == 12
+
+
+def test_worker_count(monkeypatch):
+    monkeypatch.delenv('PYTEST_XDIST_WORKER_COUNT', raising=False)
+    assert worker_count() is None
+    monkeypatch.setenv('PYTEST_XDIST_WORKER_COUNT', '8')
+    assert worker_count() == 8
+
+
+def test_port_allocator_worker_ranges():
+    base = free_port_base(100)
+    first = PortAllocator(base=base, size=50, worker=0, workers=2)
+    second = PortAllocator(base=base, size=50, worker=1, workers=2)
+    assert first.port() in range(base, base + 50)
+    assert second.port() in range(base + 50, base + 100)
+
+
+def test_port_allocator_clear_of_ephemeral_range():
+    with pytest.raises(ValueError):
+        PortAllocator(base=20000, size=300, workers=43,
+                      ephemeral=(32768, 60999))
+    with pytest.raises(ValueError):
+        PortAllocator(base=32000, size=300, worker=3,
+                      ephemeral=(32768, 60999))
+    PortAllocator(base=20000, size=300, workers=42, ephemeral=(32768, 60999))
+    PortAllocator(base=61000, size=300, workers=10, ephemeral=(32768, 60999))
+
+
+def test_worker_allocator_shrinks_ranges():
+    allocator = worker_allocator(base=20000, worker=59, workers=64,
+                                 ephemeral=(32768, 60999))
+    assert allocator.size == (32768 - 20000) // 64
+    assert allocator.start + allocator.size <= 32768
+    allocator = worker_allocator(base=20000, worker=1, workers=2,
+                                 ephemeral=(32768, 60999))
+    assert allocator.size == 300
+
+
+def test_worker_allocator_falls_back_to_os_ports():
+    workers = (32768 - 20000) // (MIN_RANGE_SIZE - 1)
+    with pytest.warns(UserWarning, match='picked by the OS'):
+        assert worker_allocator(base=20000, worker=workers - 1,
+                                workers=workers,
+                                ephemeral=(32768, 60999)) is None
+    with pytest.warns(UserWarning):
+        assert worker_allocator(base=40000, worker=0,
+                                ephemeral=(32768, 60999)) is None
+
+
+def test_configure_high_worker_index(monkeypatch):
+    for name in CONFIGURED:
+        monkeypatch.setattr(plugin, name, getattr(plugin, name))
+    monkeypatch.setattr(plugin.listeners, 'CONCURRENT',
+                        plugin.listeners.CONCURRENT)
+    monkeypatch.setenv('PYTEST_XDIST_WORKER', 'gw63')
+    monkeypatch.setenv('PYTEST_XDIST_WORKER_COUNT', '64')
+    plugin.pytest_configure(FakeConfig())
+    # nothing is reserved until a port is asked for.
+    assert plugin.PORT_ALLOCATOR is None
+
+    allocator = plugin._port_allocator()
+    assert allocator.start == 20000 + 63 * allocator.size
+    assert allocator.start + allocator.size <= ephemeral_port_range()[0]
+
+
+def test_port_allocator_run_offset():
+    offsets = {PortAllocator(base=20000, seed=seed)._next
+               for seed in range(10)}
+    assert len(offsets) > 1
+    assert all(0 <= offset < 300 for offset in offsets)
+
+
+def test_port_allocator_skips_bound_ports():
+    base = free_port_base(10)
+    allocator = PortAllocator(base=base, size=10, seed=0)
+    sock = allocator.bind()
+    try:
+        bound = sock.getsockname()[1]
+        for _ in range(20):
+            assert allocator.port() != bound
+    finally:
+        sock.close()
+
+
+def test_port_allocator_round_robin():
+    base = free_port_base(3)
+    allocator = PortAllocator(base=base, size=3, seed=0)
+    ports = [allocator.port() for _ in range(4)]
+    assert sorted(ports[:3]) == list(range(base, base + 3))
+    assert ports[3] == ports[0]
+
+
+def test_unused_port_from_port_base(monkeypatch, request):
+    base = free_port_base(300)
+    monkeypatch.setattr(plugin, 'PORT_ALLOCATOR', PortAllocator(base=base))
+    monkeypatch.setattr(plugin, 'PORT_SETTINGS', None)
+    assert request.getfixturevalue('unused_port') in range(base, base + 300)
+
+
+def test_unused_socket(unused_socket):
+    assert unused_socket.family == socket.AF_INET
+    assert unused_socket.getsockname()[1] != 0
+
+
+async def test_unused_socket_test_server(app, unused_socket, test_server):
+    port = unused_socket.getsockname()[1]
+    server = await test_server(app, sock=unused_socket)
+    assert server.port == port
+    assert server.make_url('/') == 'http://127.0.0.1:{port}/'.format(port=port)
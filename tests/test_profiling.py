@@ -0,0 +1,40 @@
+import asyncio
+
+from pytest_sanic.profiling import Profiler
+
+
+class FakeReporter:
+
+    def __init__(self):
+        self.lines = []
+
+    def write_sep(self, sep, title):
+        self.lines.append(title)
+
+    def write_line(self, line):
+        self.lines.append(line)
+
+
+def test_profiler_records_tests_and_fixtures(tmpdir):
+    loop = asyncio.new_event_loop()
+    profiler = Profiler(top=5, cprofile_dir=str(tmpdir))
+    try:
+        profiler.run(loop, asyncio.sleep(0.01), 'test_a.py::test_a')
+        profiler.run(loop, asyncio.sleep(0.02), 'test_a.py::test_a',
+                     'db', 'setup')
+        profiler.run(loop, asyncio.sleep(0), 'test_a.py::test_a',
+                     'db', 'teardown')
+    finally:
+        loop.close()
+
+    assert profiler.tests['test_a.py::test_a'].wall > 0.005
+    assert profiler.fixtures['db']['setup'].calls == 1
+    assert profiler.fixtures['db']['setup'].wall > 0.015
+    assert profiler.fixtures['db']['teardown'].calls == 1
+    assert len(tmpdir.listdir()) == 3
+
+    reporter = FakeReporter()
+    profiler.report(reporter)
+    assert reporter.lines[0] == 'sanic profile'
+    assert any('test_a.py::test_a' in line for line in reporter.lines)
+    assert any('db: setup' in line for line in reporter.lines)
@@ -0,0 +1,71 @@
+import time
+
+import httpx
+import pytest
+
+
+async def test_sanic_proxy_latency(test_cli, sanic_proxy):
+    proxy = await sanic_proxy(test_cli, latency=0.05)
+    assert test_cli.make_url('/test_get') == (
+        'http://127.0.0.1:{port}/test_get'.format(port=proxy.port))
+    start = time.perf_counter()
+    resp = await test_cli.get('/test_get')
+    # request and response are delayed once each
+    assert time.perf_counter() - start >= 0.1
+    assert resp.json() == {"GET": True}
+    assert proxy.connections == 1
+    assert proxy.bytes_sent > 0 and proxy.bytes_received > 0
+
+
+async def test_sanic_proxy_bandwidth(test_cli, sanic_proxy):
+    await sanic_proxy(test_cli, bandwidth=64 * 1024, chunk_size=1024)
+    start = time.perf_counter()
+    async with test_cli.stream('GET', '/test_stream?chunks=16') as resp:
+        body = b"".join([chunk async for chunk in resp.aiter_bytes()])
+    assert len(body) == 16 * 1024
+    # 16KB at 64KB/s
+    assert time.perf_counter() - start >= 0.2
+
+
+async def test_sanic_proxy_jitter_keeps_order(test_cli, sanic_proxy):
+    await sanic_proxy(test_cli, latency=0.01, jitter=0.01, chunk_size=100,
+                      seed=1)
+    async with test_cli.stream('GET', '/test_stream?chunks=4') as resp:
+        body = b"".join([chunk async for chunk in resp.aiter_bytes()])
+    assert body == b"x" * 4096
+
+
+async def test_sanic_proxy_reset_after(test_cli, sanic_proxy):
+    proxy = await sanic_proxy(test_cli, reset_after=2048)
+    with pytest.raises(httpx.HTTPError):
+        await test_cli.get('/test_stream?chunks=8')
+    assert proxy.resets == 1
+
+
+async def test_sanic_proxy_reset(test_cli, sanic_proxy):
+    proxy = await sanic_proxy(test_cli)
+    assert (await test_cli.get('/test_get')).status_code == 200
+    assert proxy.connections == 1
+    proxy.reset()
+    assert proxy.resets == 1
+    # the client reconnects through the proxy
+    assert (await test_cli.get('/test_get')).status_code == 200
+    assert proxy.connections == 1
+    assert proxy.resets == 1
+    await proxy.close()
+    assert proxy.connections == 0
+    assert proxy.resets == 1
+
+
+async def test_sanic_proxy_server(app, test_server, sanic_proxy):
+    server = await test_server(app)
+    proxy = await sanic_proxy(server, latency=0.01)
+    async with httpx.AsyncClient() as client:
+        resp = await client.post(proxy.make_url('/test_post'))
+    assert resp.json() == {"POST": True}
+
+
+async def test_sanic_proxy_uds(app, sanic_client, sanic_proxy):
+    client = await sanic_client(app, uds=True)
+    with pytest.raises(ValueError):
+        await sanic_proxy(client)
@@ -1,4 +1,10 @@
+import os
+import httpx
 import pytest
+import asyncio
+
+from sanic import Sanic
+from sanic import response
 
 
 async def test_fixture_test_server_get_properties(sanic_server):
@@ -23,4 +29,89 @@ async def test_fixture_test_server_raise_exception_for_non_sanic_app(test_server
         pass
 
     with pytest.raises(TypeError):
-        await test_server(SimpleApplication())
\ No newline at end of file
+        await test_server(SimpleApplication())
+
+
+async def test_fixture_test_server_close_timings(sanic_server):
+    await sanic_server.close()
+    timings = sanic_server.shutdown_timings
+    assert set(timings) == {'before_stop', 'drain', 'force_close',
+                            'wait_closed', 'after_stop', 'total'}
+    assert timings['total'] >= timings['drain']
+
+
+async def test_fixture_test_server_close_hung_handler(loop, test_server):
+    app = Sanic("test_hung_handler")
+    handling = asyncio.Event()
+
+    @app.route("/hang")
+    async def hang(request):
+        handling.set()
+        await asyncio.sleep(60)
+
+    server = await test_server(app, shutdown_timeout=0.2)
+    client = httpx.AsyncClient()
+    request = loop.create_task(client.get(server.make_url('/hang')))
+    await asyncio.wait_for(handling.wait(), 5)
+    assert len(server.connections) == 1
+
+    await server.close()
+    # waited for the handler (on another clock than the deadline), then
+    # closed its connection by force.
+    assert 0.1 < server.shutdown_timings['drain'] < 5
+    with pytest.raises(httpx.HTTPError):
+        await request
+    assert len(server.connections) == 0
+    await client.aclose()
+
+
+async def test_fixture_test_server_close_busy_connection(loop, test_server):
+    app = Sanic("test_busy_handler")
+    handling = asyncio.Event()
+
+    @app.route("/hang")
+    async def hang(request):
+        handling.set()
+        await asyncio.sleep(60)
+
+    # no shutdown_timeout: busy connections are closed right away.
+    server = await test_server(app)
+    client = httpx.AsyncClient()
+    request = loop.create_task(client.get(server.make_url('/hang')))
+    await asyncio.wait_for(handling.wait(), 5)
+    assert len(server.connections) == 1
+
+    await server.close()
+    assert server.shutdown_timings['total'] < 5
+    with pytest.raises(httpx.HTTPError):
+        await request
+    assert len(server.connections) == 0
+    await client.aclose()
+
+
+async def test_fixture_test_server_workers(test_server):
+    app = Sanic("test_workers_app")
+
+    @app.route("/pid")
+    async def pid(request):
+        return response.json({"pid": os.getpid()})
+
+    server = await test_server(app, workers=2)
+    assert len(server.processes) == 2
+    worker_pids = {process.pid for process in server.processes}
+
+    pids = set()
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(limits=limits) as client:
+        for _ in range(20):
+            resp = await client.get(server.make_url('/pid'))
+            assert resp.status_code == 200
+            pids.add(resp.json()["pid"])
+    assert pids <= worker_pids
+    assert os.getpid() not in pids
+
+    processes = server.processes
+    await server.close()
+    assert server.closed is True
+    assert not any(process.is_alive() for process in processes)
+    assert [process.exitcode for process in processes] == [0, 0]
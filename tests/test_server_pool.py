@@ -0,0 +1,60 @@
+import pytest
+
+from sanic import Sanic
+from sanic import response
+
+
+@pytest.fixture
+def pooled_app():
+    app = Sanic("test_pooled_app")
+    app.ctx.starts = 0
+
+    @app.route("/test_get", methods=['GET'])
+    async def test_get(request):
+        return response.json({"GET": True})
+
+    @app.listener("before_server_start")
+    async def count_starts(app, loop):
+        app.ctx.starts += 1
+
+    yield app
+
+
+async def test_server_pool_reuses_running_server(pooled_app, sanic_server_pool):
+    server = await sanic_server_pool.acquire(pooled_app)
+    again = await sanic_server_pool.acquire(pooled_app)
+    assert server is again
+    assert server.is_running is True
+    assert pooled_app.ctx.starts == 1
+    assert len(sanic_server_pool) == 1
+
+
+async def test_server_pool_factory_key(pooled_app, sanic_server_pool):
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return pooled_app
+
+    server = await sanic_server_pool.acquire(factory)
+    again = await sanic_server_pool.acquire(factory)
+    assert server is again
+    assert len(calls) == 1
+
+
+async def test_server_pool_shared_with_client(pooled_app, sanic_server_pool,
+                                              sanic_client):
+    server = await sanic_server_pool.acquire(pooled_app)
+    client = await sanic_client(pooled_app, server=server)
+    resp = await client.get('/test_get')
+    assert resp.status_code == 200
+    assert client.port == server.port
+    await client.close()
+    assert server.is_running is True
+
+
+async def test_server_pool_close(pooled_app, sanic_server_pool):
+    server = await sanic_server_pool.acquire(pooled_app)
+    await sanic_server_pool.close()
+    assert server.closed is True
+    assert len(sanic_server_pool) == 0
@@ -0,0 +1,39 @@
+import pytest
+
+from sanic import Sanic
+from sanic import response
+
+
+pytestmark = pytest.mark.sanic_loop_scope('module')
+
+SERVERS = []
+
+
+@pytest.fixture(scope='module')
+def shared_app():
+    app = Sanic("test_shared_pool_app")
+    app.ctx.starts = 0
+
+    @app.route("/test_get", methods=['GET'])
+    async def test_get(request):
+        return response.json({"GET": True})
+
+    @app.listener("before_server_start")
+    async def count_starts(app, loop):
+        app.ctx.starts += 1
+
+    return app
+
+
+async def test_server_pool_module_first(shared_app, sanic_server_pool):
+    SERVERS.append(await sanic_server_pool.acquire(shared_app))
+
+
+async def test_server_pool_module_second(shared_app, sanic_server_pool,
+                                         sanic_client):
+    server = await sanic_server_pool.acquire(shared_app)
+    assert server is SERVERS[0]
+    assert server.is_running is True
+    assert shared_app.ctx.starts == 1
+    client = await sanic_client(shared_app, server=server)
+    assert (await client.get('/test_get')).status_code == 200